@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import platform
+import statistics
+import sys
+import time
+
+from tests.rpc_server import StandInRPC, account_history, make_chain
+from xno_gate.entities import LockState, Received
+import xno_gate.gate as xno_gate
+
+"""Benchmarks for the gate's hot paths. Results are written as json, so runs from different releases can be compared.
+
+    python -m benchmarks.bench_gate --output results.json
+    python -m benchmarks.bench_gate --quick --compare results.json
+"""
+
+
+class MemoryInterface(xno_gate.XnoInterface):
+    """Answer from in-memory histories, newest first, with no lock state caching unless asked."""
+
+    received_ordered = True
+
+    def __init__(self, cache=False):
+        self.history = dict()
+        self.pending = dict()
+        self.cache = cache
+        self._lock_state = None
+
+    def received(self, account):
+        return iter(self.history.get(account, []))
+
+    def receivable(self, account, threshold=10 ** 30):
+        return [payment for payment in self.pending.get(account, []) if payment.amount >= threshold]
+
+    def save_lock_state(self, unlocked, until=None):
+        if self.cache:
+            self._lock_state = LockState(unlocked, until or datetime.now() + timedelta(seconds=60))
+
+    def load_lock_state(self):
+        return self._lock_state
+
+
+def history(blocks, now):
+    """Build {blocks} Received payments, newest first, one minute apart, of alternating size."""
+    return [Received(10 ** 30 * (1 + n % 2), now - timedelta(seconds=60 * n)) for n in range(blocks)]
+
+
+def measure(fn, repeat, number=1):
+    """Time {fn}, {number} calls per run, over {repeat} runs. Output: per call seconds for each run."""
+    runs = list()
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        for _ in range(number):
+            fn()
+
+        runs.append((time.perf_counter() - start) / number)
+
+    return runs
+
+
+def result(name, params, runs):
+    return \
+        {
+            "name": name,
+            "params": params,
+            "runs": len(runs),
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "mean": statistics.mean(runs),
+        }
+
+
+def bench_unlocked(key_counts, repeat):
+    """Gate.unlocked on a cache hit, and on a miss where every key is checked and none unlocks."""
+    now = datetime.now()
+
+    for keys in key_counts:
+        for hit in (True, False):
+            iface = MemoryInterface(cache=hit)
+            gate = xno_gate.Gate(iface)
+
+            for n in range(keys):
+                account = f"nano_{n}"
+                gate.add_key(account, 3 * 10 ** 30, 600 + n)
+                iface.history[account] = history(5, now)
+
+            gate.unlocked()
+            number = 1000 if hit else max(1, 1000 // keys)
+            yield result("unlocked", {"keys": keys, "cache": "hit" if hit else "miss"}, measure(gate.unlocked, repeat, number))
+
+
+def bench_history_queries(depths, repeat):
+    """been_paid and total_received_since when the answer is at the far end of the history."""
+    now = datetime.now()
+
+    for blocks in depths:
+        iface = MemoryInterface()
+        iface.history["nano_deep"] = history(blocks, now)
+        iface.history["nano_deep"][-1].amount = 5 * 10 ** 30
+        gate = xno_gate.Gate(iface)
+        oldest = now - timedelta(seconds=60 * blocks)
+        number = max(1, 100000 // blocks)
+
+        yield result("been_paid", {"blocks": blocks},
+                     measure(lambda: gate.been_paid("nano_deep", 5 * 10 ** 30), repeat, number))
+        yield result("total_received_since", {"blocks": blocks},
+                     measure(lambda: gate.total_received_since("nano_deep", oldest), repeat, number))
+
+
+def bench_rpc(page_sizes, latency, repeat):
+    """DefaultRPCInterface round trip and json parsing against a local stand-in node."""
+    for page in page_sizes:
+        chain = make_chain(page)
+        pending = {"blocks": {f"{n:064X}": str(10 ** 30 + n) for n in range(page)}}
+
+        def respond(rpc_call):
+            if rpc_call["action"] == "receivable":
+                return pending
+
+            return account_history(chain)(rpc_call)
+
+        with StandInRPC(respond, latency=latency) as node:
+            rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=page, coalesce=False)
+            params = {"blocks": page, "latency": latency}
+
+            yield result("rpc_received", params, measure(lambda: list(rpc.received("nano_a")), repeat, 5))
+            yield result("rpc_receivable", params, measure(lambda: rpc.receivable("nano_a", 1), repeat, 5))
+
+
+def run(quick=False, latency=0.0):
+    repeat = 3 if quick else 7
+    key_counts = [1, 100] if quick else [1, 100, 10000]
+    depths = [25, 1000] if quick else [25, 1000, 100000]
+    page_sizes = [25, 1000] if quick else [25, 1000, 5000]
+
+    results = list()
+
+    for group in (bench_unlocked(key_counts, repeat), bench_history_queries(depths, repeat), bench_rpc(page_sizes, latency, repeat)):
+        for entry in group:
+            print(f"{entry['name']:24} {json.dumps(entry['params']):40} median {entry['median'] * 1e6:12.1f} us", file=sys.stderr)
+            results.append(entry)
+
+    return \
+        {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "when": datetime.now().isoformat(),
+                "quick": quick,
+            },
+            "results": results,
+        }
+
+
+def compare(current, baseline, tolerance):
+    """Print each benchmark's median against {baseline}. Output: the names of those slower by more than {tolerance}."""
+    before = {(entry["name"], json.dumps(entry["params"], sort_keys=True)): entry for entry in baseline["results"]}
+    regressions = list()
+
+    for entry in current["results"]:
+        key = (entry["name"], json.dumps(entry["params"], sort_keys=True))
+
+        if key not in before:
+            continue
+
+        ratio = entry["median"] / before[key]["median"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{entry['name']:24} {key[1]:40} x{ratio:6.2f} {flag}", file=sys.stderr)
+
+        if flag:
+            regressions.append(key)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gate's hot paths.")
+    parser.add_argument("--output", type=str, help="Write results to this json file.")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and fewer runs.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-in RPC node waits before answering.")
+    parser.add_argument("--compare", type=str, help="Baseline json results to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Slowdown ratio over the baseline that counts as a regression.")
+    args = parser.parse_args()
+
+    results = run(args.quick, args.latency)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+
+class StandInRPC:
+
+    def __init__(self, responder, latency=0):
+        """A local stand-in for a Nano RPC node, served over keep-alive HTTP/1.1 on a background thread.
+
+        Arguments:
+            responder: callable taking the decoded RPC call and returning a json-able response, or an (http status, response) tuple.
+            latency: float, seconds to sleep before answering each call.
+        """
+        self.responder = responder
+        self.latency = latency
+        self.calls = list()
+        self.connections = set()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                rpc_call = json.loads(self.rfile.read(length))
+
+                stand_in.calls.append(rpc_call)
+                stand_in.connections.add(self.client_address)
+
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+
+                response = stand_in.responder(rpc_call)
+                status = 200
+
+                if type(response) is tuple:
+                    status, response = response
+
+                body = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                return
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def history_block(amount, timestamp, block_hash, block_type="receive"):
+    """Build an account_history record, per the RPC spec."""
+    return \
+        {
+            "type": block_type,
+            "account": "nano_1iroza4zsyt95uk6ucwhe1nwbe5q7g87gxfhcyuoetfkz5jmac8mtfwwoac4",
+            "amount": str(amount),
+            "local_timestamp": str(timestamp),
+            "height": "1",
+            "hash": block_hash,
+            "confirmed": "true",
+        }
+
+
+def account_history(chain):
+    """Build a responder that serves account_history from {chain}, a list of history records newest first, honoring `count` and `head`."""
+
+    def respond(rpc_call):
+        start = 0
+
+        if "head" in rpc_call:
+            start = [block["hash"] for block in chain].index(rpc_call["head"])
+
+        page = chain[start:start + int(rpc_call["count"])]
+        response = {"account": rpc_call["account"], "history": page or ""}
+
+        if start + len(page) < len(chain):
+            response["previous"] = chain[start + len(page)]["hash"]
+
+        return response
+
+    return respond
+
+
+def make_chain(length, start=1700000000, amount=10 ** 30):
+    """Build a chain of {length} blocks, newest first, alternating receives and sends one minute apart."""
+    return [history_block(amount, start + 60 * n, f"{n:064X}", "receive" if n % 2 == 0 else "send")
+            for n in reversed(range(length))]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from datetime import datetime, timedelta
+import time
+
+from tests.factories import KeyFactory, ReceivedFactory, ReceivableFactory
+from tests.rpc_server import StandInRPC, account_history, make_chain
+from tests.test_main import FakeInterface, UnlockableInterface, standard_payments
+import tests.test_main as blocking
+from xno_gate.aio import AsyncGate, AsyncRPCInterface
+from xno_gate.entities import LockState
+import xno_gate.gate as xno_gate
+
+
+class SlowInterface(AsyncRPCInterface):
+    """Answer from an UnlockableInterface after a delay, counting calls."""
+
+    def __init__(self, delay):
+        super().__init__(UnlockableInterface())
+        self.delay = delay
+        self.calls = 0
+
+    async def received(self, account):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.xno_interface.received(account)
+
+    async def iter_received(self, account):
+        for payment in await self.received(account):
+            yield payment
+
+    async def receivable(self, account, threshold=10 ** 30):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.xno_interface.receivable(account, threshold)
+
+
+def test_async_queries():
+    """The async gate answers the same questions as the blocking one."""
+    iface = AsyncRPCInterface(FakeInterface(standard_payments, [ReceivableFactory(amount=500), ReceivableFactory(amount=1000)]))
+    gate = AsyncGate(iface)
+    [p1, p2, p3] = standard_payments
+
+    async def ask():
+        assert await gate.been_paid("a", 2000) == p2.time
+        assert await gate.been_paid("a", 6000) is None
+        assert await gate.total_received_since("a", datetime(2023, 1, 1)) == p1.amount + p2.amount
+        assert await gate.has_receivable("a", 1000)
+        assert not await gate.has_receivable("a", 1001)
+        assert await gate.total_receivable("a") == 1500
+
+    asyncio.run(ask())
+
+
+def test_async_gate_checks_keys_concurrently():
+    """Latency should not grow with the number of keys."""
+    iface = SlowInterface(0.05)
+    gate = AsyncGate(iface)
+
+    for _ in range(10):
+        key = KeyFactory()
+        gate.add_key(key.account, key.amount, key.timeout)
+
+    start = time.monotonic()
+    assert asyncio.run(gate.unlocked()) is None
+    assert time.monotonic() - start < 0.3
+    assert iface.calls == 10
+
+
+def test_async_gate_prefers_longest_timeout():
+    """When several keys unlock, the longest timeout wins, as with Gate."""
+    iface = SlowInterface(0)
+    gate = AsyncGate(iface)
+
+    short_key = KeyFactory(timeout=5 * 60)
+    long_key = KeyFactory(timeout=15 * 60)
+    gate.add_key(short_key.account, short_key.amount, short_key.timeout)
+    gate.add_key(long_key.account, long_key.amount, long_key.timeout)
+
+    received = ReceivedFactory(amount=max(short_key.amount, long_key.amount) + 1, time=datetime.now())
+    iface.xno_interface.add_received(short_key.account, received)
+    iface.xno_interface.add_received(long_key.account, received)
+
+    difference = asyncio.run(gate.unlocked()) - datetime.now()
+    assert difference > timedelta(seconds=short_key.timeout) and difference <= timedelta(seconds=long_key.timeout)
+
+
+def test_async_gate_prefers_cache():
+    """A cached verdict in the future is returned without checking keys."""
+    iface = SlowInterface(0)
+    gate = AsyncGate(iface)
+    key = KeyFactory()
+    gate.add_key(key.account, key.amount, key.timeout)
+
+    until = datetime.now() + timedelta(seconds=30)
+    iface.xno_interface._lock_state = LockState(True, until)
+
+    assert asyncio.run(gate.unlocked()) == until
+    assert iface.calls == 0
+
+
+def test_async_tiers_share_one_fetch():
+    """Every tier of an account is checked against one received and one receivable lookup."""
+    iface = SlowInterface(0)
+    gate = AsyncGate(iface)
+    now = datetime.now().replace(microsecond=0)
+
+    gate.add_key("a", 10 ** 30, 60, receivable=True)
+    gate.add_key("a", 5 * 10 ** 30, 600)
+    iface.xno_interface.add_received("a", ReceivedFactory(amount=5 * 10 ** 30, time=now))
+
+    assert asyncio.run(gate.unlocked()) == now + timedelta(seconds=600)
+    assert iface.calls == 2
+
+
+def test_async_history_matches_gate(tmp_path):
+    """With since, been_paid pages back through history as Gate does, one page per trip to the executor."""
+    chain = make_chain(100)
+    newest = int(chain[0]["local_timestamp"])
+
+    with StandInRPC(account_history(chain)) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=10)
+        gate, blocking_gate = AsyncGate(AsyncRPCInterface(rpc)), xno_gate.Gate(rpc)
+        since = datetime.fromtimestamp(newest - 15 * 60)
+        when = datetime.fromtimestamp(newest - 35 * 60)
+
+        async def ask():
+            assert await gate.been_paid("a", 2 * 10 ** 30, since=since) is None
+            assert len(node.calls) == 2
+
+            assert await gate.been_paid("a", 10 ** 30, since=since) == blocking_gate.been_paid("a", 10 ** 30, since=since)
+            assert await gate.total_received_since("a", when) == blocking_gate.total_received_since("a", when) == 18 * 10 ** 30
+
+        asyncio.run(ask())
+
+
+def test_async_rpc_interface_runs_past_default_executor():
+    """Blocking lookups run on the interface's own pool, sized past the loop's default executor."""
+    inner = blocking.SlowInterface(0.2)
+    gate = AsyncGate(AsyncRPCInterface(inner, max_workers=48))
+
+    for _ in range(40):
+        key = KeyFactory()
+        gate.add_key(key.account, key.amount, key.timeout)
+
+    start = time.monotonic()
+    assert asyncio.run(gate.unlocked()) is None
+    assert time.monotonic() - start < 0.35
+    assert inner.calls == 40
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_main import FakeInterface, standard_payments
+from xno_gate.analytics import HistoryFrame
+from xno_gate.entities import ReceivedBatch
+import xno_gate.analytics as analytics
+
+NOW = 1727070000
+HUGE = 2 ** 127 + 12345
+
+
+def frame_batches():
+    """Two accounts with amounts past 64 bits, split over pages, and one account with nothing."""
+    first = ReceivedBatch()
+    first.append(HUGE, NOW)
+    first.append(2 ** 64 - 1, NOW - 60)
+
+    second = ReceivedBatch()
+    second.append(2 ** 64, NOW - 120)
+    second.append(10 ** 30, NOW - 3600)
+
+    other = ReceivedBatch()
+    other.append(10 ** 30, NOW - 30)
+    other.append(5 * 10 ** 30, NOW - 90)
+
+    return {"nano_a": [first, second], "nano_b": [other], "nano_c": []}
+
+
+def engines():
+    return [False, True] if analytics._numpy() is not None else [False]
+
+
+@pytest.mark.parametrize("use_numpy", engines())
+def test_window_totals(use_numpy):
+    """Windowed sums are exact raw, with an inclusive start and exclusive end."""
+    frame = HistoryFrame(frame_batches(), use_numpy)
+    start = datetime.fromtimestamp(NOW - 120)
+
+    assert frame.window_totals(start) == {"nano_a": HUGE + 2 ** 64 - 1 + 2 ** 64, "nano_b": 6 * 10 ** 30, "nano_c": 0}
+    assert frame.window_totals(start, datetime.fromtimestamp(NOW)) == {"nano_a": 2 ** 65 - 1, "nano_b": 6 * 10 ** 30, "nano_c": 0}
+
+    # fractional bounds: the payment at NOW - 120 is before a start half a second later, the one at NOW before an end just after it
+    half = timedelta(microseconds=500000)
+    assert frame.window_totals(start + half, datetime.fromtimestamp(NOW) + half) == {"nano_a": HUGE + 2 ** 64 - 1, "nano_b": 6 * 10 ** 30, "nano_c": 0}
+
+
+@pytest.mark.parametrize("use_numpy", engines())
+def test_first_at_least(use_numpy):
+    """The newest single payment over a threshold, compared across both words."""
+    frame = HistoryFrame(frame_batches(), use_numpy)
+
+    assert frame.first_at_least(2 ** 64) == {"nano_a": datetime.fromtimestamp(NOW), "nano_b": datetime.fromtimestamp(NOW - 30), "nano_c": None}
+    assert frame.first_at_least(2 ** 64 + 1, since=datetime.fromtimestamp(NOW - 7200))["nano_a"] == datetime.fromtimestamp(NOW)
+    assert frame.first_at_least(HUGE + 1) == {"nano_a": None, "nano_b": None, "nano_c": None}
+    assert frame.first_at_least(2 * 10 ** 30, since=datetime.fromtimestamp(NOW - 60))["nano_b"] is None
+    assert frame.first_at_least(2 ** 64, since=datetime.fromtimestamp(NOW) + timedelta(microseconds=500000))["nano_a"] is None
+
+
+@pytest.mark.parametrize("use_numpy", engines())
+def test_bucket_totals(use_numpy):
+    """Time bucketed totals per account, oldest bucket first."""
+    frame = HistoryFrame(frame_batches(), use_numpy)
+    totals = frame.bucket_totals(datetime.fromtimestamp(NOW - 120), datetime.fromtimestamp(NOW + 1), timedelta(minutes=1))
+
+    assert totals["nano_a"] == [2 ** 64, 2 ** 64 - 1, HUGE]
+    assert totals["nano_b"] == [5 * 10 ** 30, 10 ** 30, 0]
+    assert totals["nano_c"] == [0, 0, 0]
+
+    start = datetime.fromtimestamp(NOW - 120) + timedelta(microseconds=500000)
+    totals = frame.bucket_totals(start, datetime.fromtimestamp(NOW + 1), timedelta(minutes=1))
+    assert totals["nano_a"] == [2 ** 64 - 1, HUGE, 0]
+
+
+def test_engines_agree():
+    """The NumPy engine answers exactly as the pure Python fallback does."""
+    pytest.importorskip("numpy")
+    batches = dict()
+
+    for n in range(20):
+        batch = ReceivedBatch()
+
+        for m in range(50):
+            batch.append((n + 1) * (m + 1) * 10 ** 28 + 2 ** 70 * (m % 3), NOW - 37 * m)
+
+        batches[f"nano_{n}"] = [batch]
+
+    fast, slow = HistoryFrame(batches, True), HistoryFrame(batches, False)
+    start, end = datetime.fromtimestamp(NOW - 1000), datetime.fromtimestamp(NOW)
+
+    assert fast.window_totals(start, end) == slow.window_totals(start, end)
+    assert fast.first_at_least(2 ** 71) == slow.first_at_least(2 ** 71)
+    assert fast.bucket_totals(start, end, timedelta(minutes=5)) == slow.bucket_totals(start, end, timedelta(minutes=5))
+
+
+def test_numpy_required_when_asked(monkeypatch):
+    monkeypatch.setattr(analytics, "_numpy", lambda: None)
+
+    with pytest.raises(ImportError):
+        HistoryFrame(frame_batches(), use_numpy=True)
+
+    assert HistoryFrame(frame_batches()).use_numpy is False
+
+
+def test_numpy_imported_on_first_use():
+    """Importing the package leaves NumPy unloaded until a HistoryFrame wants it."""
+    check = "import sys, xno_gate; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check], check=True)
+
+
+def test_from_interface():
+    """Histories are fetched as batches through any XnoInterface."""
+    frame = HistoryFrame.from_interface(FakeInterface(standard_payments, []), ["nano_a"])
+
+    assert frame.window_totals(datetime(2023, 1, 1)) == {"nano_a": 5000}
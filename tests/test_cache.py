@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import time
+
+import pytest
+
+from tests.factories import ReceivableFactory
+from tests.rpc_server import StandInRPC, account_history, history_block, make_chain
+from tests.test_main import SlowInterface, standard_payments
+from xno_gate.cache import CachingInterface
+import xno_gate.gate as xno_gate
+
+
+def test_cache_memoizes_lookups():
+    """Repeated lookups are answered without the wrapped interface."""
+    inner = SlowInterface(0)
+    inner.add_received("a", standard_payments[0])
+    inner.add_receivable("a", ReceivableFactory(amount=5000))
+    gate = xno_gate.Gate(CachingInterface(inner, ttl=60))
+
+    for _ in range(3):
+        assert gate.been_paid("a", 1000) == standard_payments[0].time
+        assert gate.has_receivable("a", 1000)
+
+    assert inner.calls == 2
+    assert gate.total_receivable_many(["a", "b"]) == {"a": 5000, "b": 0}
+    assert gate.total_receivable_many(["a", "b"]) == {"a": 5000, "b": 0}
+    assert inner.calls == 4
+
+
+def test_cache_expires_and_evicts():
+    """Entries expire after their ttl, and the least recently used entry goes first."""
+    inner = SlowInterface(0)
+    cache = CachingInterface(inner, ttl=0.05, maxsize=2)
+
+    cache.received("a")
+    cache.received("b")
+    cache.received("a")
+    cache.received("c")
+    assert inner.calls == 3
+
+    cache.received("a")
+    assert inner.calls == 3
+    cache.received("b")
+    assert inner.calls == 4
+
+    time.sleep(0.06)
+    cache.received("b")
+    assert inner.calls == 5
+
+    cache.invalidate("b")
+    cache.received("b")
+    assert inner.calls == 6
+
+
+def test_cache_single_flight():
+    """Concurrent misses for one account share a single call."""
+    inner = SlowInterface(0.1)
+    cache = CachingInterface(inner)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: cache.received("a"), range(8)))
+
+    assert inner.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_cache_streams_deep_history():
+    """A gate behind the cache pages back through history as it would unwrapped, and replays the pages it already read."""
+    chain = make_chain(40, amount=10 ** 30)
+    chain.append(history_block(5 * 10 ** 30, 1700000000 - 60, "F" * 64))
+
+    with StandInRPC(account_history(chain)) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=10)
+        cache = CachingInterface(rpc, ttl=60)
+        gate = xno_gate.Gate(cache)
+
+        assert cache.received_columnar and cache.receivable_aggregates
+        assert gate.been_paid("a", 5 * 10 ** 30, since=datetime.fromtimestamp(0)) == datetime.fromtimestamp(1700000000 - 60)
+        assert len(node.calls) == 5
+
+        assert gate.been_paid("a", 5 * 10 ** 30, since=datetime.fromtimestamp(0)) == datetime.fromtimestamp(1700000000 - 60)
+        assert gate.total_received_since("a", datetime.fromtimestamp(1700000000)) == 20 * 10 ** 30
+        assert xno_gate.Gate(rpc).total_received_since("a", datetime.fromtimestamp(1700000000)) == 20 * 10 ** 30
+        assert len(node.calls) == 10
+
+
+def test_cache_drops_failed_streams():
+    """A stream that raises is not replayed; the next query asks again."""
+    inner = SlowInterface(0)
+    cache = CachingInterface(inner, ttl=60)
+    inner.received = lambda account: (_ for _ in ()).throw(ValueError("down"))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            list(cache.iter_received("a"))
+
+    del inner.received
+    assert list(cache.iter_received("a")) == []
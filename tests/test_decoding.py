@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from tests.rpc_server import StandInRPC, account_history, history_block, make_chain
+from xno_gate.decoding import JSONDecoder, OrjsonDecoder, default_decoder
+import xno_gate.decoding as decoding
+import xno_gate.gate as xno_gate
+
+
+class CountingDecoder(JSONDecoder):
+    """The standard library decoder, counting the bodies it parses."""
+
+    def __init__(self):
+        self.parsed = 0
+
+    def loads(self, body):
+        self.parsed += 1
+        return super().loads(body)
+
+
+def decoders():
+    found = [JSONDecoder()]
+
+    if decoding.orjson is not None:
+        found.append(OrjsonDecoder())
+
+    return found
+
+
+@pytest.mark.parametrize("decoder", decoders(), ids=lambda d: d.name)
+def test_decoders_produce_typed_blocks(decoder):
+    """Every decoder parses bodies into the same typed history and receivable blocks."""
+    history = [history_block(2 ** 127, 1727070138, "B" * 64), history_block(10 ** 30, 1727070000, "A" * 64, "send")]
+    body = json.dumps({"history": history, "previous": "00"}).encode()
+
+    blocks = decoder.history(decoder.loads(body))
+
+    assert [(b.type, b.hash, b.amount, b.local_timestamp) for b in blocks] == \
+        [("receive", "B" * 64, 2 ** 127, 1727070138), ("send", "A" * 64, 10 ** 30, 1727070000)]
+    assert blocks[0].received().amount == 2 ** 127
+    assert blocks[1].received() is None
+
+    assert decoder.history(decoder.loads(b'{"history": ""}')) == []
+    assert [r.amount for r in decoder.receivable(decoder.loads(b'{"AA": "10", "BB": "20"}'))] == [10, 20]
+    assert decoder.receivable("") is None
+
+    with pytest.raises(ValueError):
+        decoder.loads(b"<html>bad gateway</html>")
+
+
+def test_default_decoder_falls_back(monkeypatch):
+    """Without orjson or msgspec, the standard library parses."""
+    monkeypatch.setattr(decoding, "orjson", None)
+    monkeypatch.setattr(decoding, "msgspec", None)
+
+    assert default_decoder().name == "json"
+
+
+def test_each_body_parsed_once(tmp_path):
+    """Every RPC response is parsed exactly once, including the receivable error path."""
+    decoder = CountingDecoder()
+
+    def respond(rpc_call):
+        if rpc_call["action"] == "receivable":
+            return {"error": "Bad account number"}
+
+        return account_history(make_chain(30))(rpc_call)
+
+    with StandInRPC(respond) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=10, decoder=decoder)
+
+        assert len(list(rpc.iter_received("a"))) == 15
+        assert decoder.parsed == len(node.calls) == 3
+
+        with pytest.raises(ValueError, match="Bad account number"):
+            rpc.receivable("a")
+
+        assert decoder.parsed == len(node.calls) == 4
+
+
+def test_batches_skip_block_objects(tmp_path, monkeypatch):
+    """Columnar history reads decoded records straight into batches, without a HistoryBlock per record."""
+    monkeypatch.setattr(decoding.HistoryBlock, "from_json", None)
+
+    with StandInRPC(account_history(make_chain(30))) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=10, decoder=JSONDecoder())
+
+        assert sum(len(batch) for batch in rpc.iter_received_batches("a")) == 15
+        assert len(node.calls) == 3
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+from tests.rpc_server import StandInRPC
+from xno_gate.endpoints import EndpointPool
+import xno_gate.gate as xno_gate
+from xno_gate.session import RPCSession
+
+
+def receivable(rpc_call):
+    return {"blocks": {"B" * 64: "2000"}}
+
+
+def broken(rpc_call):
+    return 500, {"error": "down"}
+
+
+def test_pool_prefers_fastest_node(tmp_path):
+    """Once both nodes are measured, calls go to the faster one."""
+    with StandInRPC(receivable, latency=0.05) as slow, StandInRPC(receivable) as fast:
+        rpc = xno_gate.DefaultRPCInterface([slow.url, fast.url], tmp_path / "cache.json")
+
+        for _ in range(10):
+            assert [r.amount for r in rpc.receivable("a")] == [2000]
+
+        assert len(slow.calls) == 1
+        assert len(fast.calls) == 9
+
+        stats = rpc.endpoints.stats()
+        assert stats[slow.url]["latency"] > stats[fast.url]["latency"]
+        assert stats[fast.url]["calls"] == 9 and stats[fast.url]["errors"] == 0
+
+
+def test_pool_ejects_failing_node(tmp_path):
+    """A failing node is routed around, then skipped entirely once its circuit opens."""
+    with StandInRPC(broken) as bad, StandInRPC(receivable, latency=0.01) as good:
+        pool = EndpointPool([bad.url, good.url], RPCSession(retries=0), failures=2, cooldown=60)
+        rpc = xno_gate.DefaultRPCInterface(pool, tmp_path / "cache.json")
+
+        for _ in range(5):
+            assert [r.amount for r in rpc.receivable("a")] == [2000]
+
+        assert len(bad.calls) == 2
+        assert len(good.calls) == 5
+        assert pool.stats()[bad.url]["open"]
+        assert pool.stats()[bad.url]["errors"] == 2
+
+
+def test_pool_counts_each_failure_without_session_retries():
+    """With several nodes, the default session leaves retries to the pool, so a failing node costs one request per call and no backoff."""
+    with StandInRPC(broken) as bad, StandInRPC(receivable, latency=0.01) as good:
+        rpc = xno_gate.DefaultRPCInterface([bad.url, good.url], None)
+
+        start = time.monotonic()
+
+        for _ in range(4):
+            assert [r.amount for r in rpc.receivable("a")] == [2000]
+
+        assert time.monotonic() - start < 0.5
+        assert len(bad.calls) == 3
+        assert rpc.endpoints.stats()[bad.url]["open"]
+
+
+def test_pool_hedges_slow_calls(tmp_path):
+    """A call slower than the fastest node usually is gets duplicated to the next node."""
+    with StandInRPC(receivable) as usually_fast, StandInRPC(receivable, latency=0.05) as steady:
+        pool = EndpointPool([usually_fast.url, steady.url], hedge=0.9, hedge_after=5)
+        rpc = xno_gate.DefaultRPCInterface(pool, tmp_path / "cache.json")
+
+        for _ in range(6):
+            rpc.receivable("a")
+
+        usually_fast.latency = 1
+        start = time.monotonic()
+        assert [r.amount for r in rpc.receivable("a")] == [2000]
+        assert time.monotonic() - start < 0.5
+        assert len(steady.calls) == 2
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import pytest
+
+from tests.factories import KeyFactory, LockStateFactory, ReceivedFactory, ReceivableFactory
+from tests.rpc_server import history_block
+from tests.test_main import FakeInterface, standard_payments
+from xno_gate.entities import ReceivedBatch
+import xno_gate.gate as xno_gate
+
+
+def test_entities_are_slotted():
+    """Entities carry no per instance __dict__."""
+    for entity in [ReceivedFactory(), ReceivableFactory(), KeyFactory(), LockStateFactory(), ReceivedBatch()]:
+        with pytest.raises(AttributeError):
+            entity.extra = 1
+
+
+def test_batch_keeps_raw_amounts_exact():
+    """Amounts past 64 bits survive the split into words."""
+    huge = 340282366920938463463374607431768211455
+    history = \
+        [
+            history_block(huge, 1727070300, "C" * 64),
+            history_block(10 ** 30, 1727070200, "B" * 64, "send"),
+            history_block(2 ** 64, 1727070100, "A" * 64),
+            history_block(2 ** 64 - 1, 1727070000, "9" * 64),
+        ]
+
+    batch = ReceivedBatch.from_history(history)
+
+    assert len(batch) == 3
+    assert [batch.amount(n) for n in range(3)] == [huge, 2 ** 64, 2 ** 64 - 1]
+    assert batch.total() == huge + 2 ** 64 + 2 ** 64 - 1
+    assert batch.total(1) == 2 ** 65 - 1
+    assert batch.first_at_least(2 ** 64 + 1) == 0
+    assert batch.first_at_least(2 ** 64) == 0
+    assert batch.older_than(1727070100) == 2
+    assert batch.older_than(0) == 3
+    assert batch.time(1) == datetime.fromtimestamp(1727070100)
+    assert [payment.amount for payment in batch] == [huge, 2 ** 64, 2 ** 64 - 1]
+
+
+class ColumnarInterface(FakeInterface):
+    """FakeInterface answering through the columnar path."""
+
+    received_columnar = True
+
+
+def test_gate_columnar_queries_match():
+    """Columnar queries give the same answers as the object path."""
+    columnar = xno_gate.Gate(ColumnarInterface(standard_payments, []))
+    objects = xno_gate.Gate(FakeInterface(standard_payments, []))
+
+    for amount in [1000, 2000, 4000, 6000]:
+        assert columnar.been_paid("a", amount) == objects.been_paid("a", amount)
+        assert columnar.been_paid("a", amount, since=datetime(2023, 1, 1)) == objects.been_paid("a", amount, since=datetime(2023, 1, 1))
+
+    for when in [datetime(2020, 1, 1), datetime(2023, 1, 1), datetime(2024, 8, 1)]:
+        assert columnar.total_received_since("a", when) == objects.total_received_since("a", when)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import json
+
+from tests.rpc_server import StandInRPC, account_history, history_block, make_chain
+from xno_gate.entities import Received
+import xno_gate.gate as xno_gate
+from xno_gate.history import HistoryStore
+
+
+def test_history_store_syncs_incrementally(tmp_path):
+    """The first sync pages through the whole history; later syncs only fetch blocks past the frontier."""
+    chain = make_chain(60)
+
+    with StandInRPC(account_history(chain)) as node:
+        store = HistoryStore(tmp_path / "history.json")
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", history_store=store)
+
+        received = list(rpc.received("a"))
+        assert len(received) == 30
+        assert len(node.calls) == 3
+        assert received[0].time == datetime.fromtimestamp(1700000000 + 60 * 58)
+
+        chain.insert(0, history_block(7, 1700000000 + 60 * 61, "F" * 64))
+        node.calls.clear()
+
+        received = list(rpc.received("a"))
+        assert len(node.calls) == 1
+        assert [r.amount for r in received[:2]] == [7, 10 ** 30]
+        assert len(received) == 31
+        assert store.frontier("a") == ("F" * 64, 1700000000 + 60 * 61)
+
+
+def test_history_store_persists(tmp_path):
+    """A reloaded store resumes from its saved frontier."""
+    path = tmp_path / "history.json"
+    chain = make_chain(10)
+
+    with StandInRPC(account_history(chain)) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", history_store=HistoryStore(path))
+        first = [(r.amount, r.time) for r in rpc.received("a")]
+
+        reloaded = HistoryStore(path)
+        assert reloaded.frontier("a") == (chain[0]["hash"], int(chain[0]["local_timestamp"]))
+        assert [(r.amount, r.time) for r in reloaded.received("a")] == first
+
+
+def test_history_store_drops_stale_updates():
+    """An update fetched against an old frontier is not stored twice."""
+    store = HistoryStore()
+    assert store.extend("a", [], "A", 1)
+    assert not store.extend("a", [], "B", 2, previous=None)
+    assert store.frontier("a") == ("A", 1)
+
+
+def test_history_store_appends_updates(tmp_path):
+    """Each update appends a line instead of rewriting the store; old single json files and a torn last line still load."""
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps({"a": {"frontier": "A", "timestamp": 1, "received": [["5", 1700000000]]}}))
+
+    store = HistoryStore(path)
+    assert store.frontier("a") == ("A", 1)
+
+    store.extend("a", [Received(7, datetime.fromtimestamp(1700000060))], "B", 2, previous="A")
+    size = path.stat().st_size
+    store.extend("b", [Received(9, datetime.fromtimestamp(1700000120))], "C", 3)
+
+    with open(path, "r") as f:
+        f.seek(size)
+        assert json.loads(f.read())["account"] == "b"
+
+    with open(path, "a") as f:
+        f.write('{"account": "a", "fron')
+
+    reloaded = HistoryStore(path)
+    assert [r.amount for r in reloaded.received("a")] == [7, 5]
+    assert reloaded.frontier("b") == ("C", 3)
+
+    reloaded.extend("b", [], "D", 4, previous="C")
+    assert HistoryStore(path).frontier("b") == ("D", 4)
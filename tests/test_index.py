@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+from tests.rpc_server import StandInRPC, account_history, history_block, make_chain
+from xno_gate.index import PaymentIndex
+import xno_gate.gate as xno_gate
+
+
+def serve(chain, pending):
+    """Answer account_history from {chain} and accounts_receivable from {pending}."""
+    history = account_history(chain)
+
+    def respond(rpc_call):
+        if rpc_call["action"] == "accounts_receivable":
+            return {"blocks": {account: {f"{n:064X}": str(a) for n, a in enumerate(pending)} or "" for account in rpc_call["accounts"]}}
+
+        return history(rpc_call)
+
+    return respond
+
+
+def test_index_answers_locally(tmp_path):
+    """After an ingest, Gate queries are indexed lookups with no RPC calls."""
+    chain = make_chain(40)
+    chain[-1]["amount"] = str(2 ** 127)
+    newest = int(chain[0]["local_timestamp"])
+
+    with StandInRPC(serve(chain, [10 ** 30, 5 * 10 ** 30])) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, None, lookback=10)
+        index = PaymentIndex(tmp_path / "index.db", rpc)
+        index.ingest("a")
+
+        assert [call["action"] for call in node.calls].count("account_history") == 4
+        node.calls.clear()
+
+        gate = xno_gate.Gate(index)
+        assert gate.been_paid("a", 10 ** 30) == datetime.fromtimestamp(newest - 60)
+        assert gate.been_paid("a", 2 * 10 ** 30) == datetime.fromtimestamp(newest - 39 * 60)
+        assert gate.been_paid("a", 2 * 10 ** 30, since=datetime.fromtimestamp(newest - 30 * 60)) is None
+        assert gate.total_received_since("a", datetime.fromtimestamp(newest - 35 * 60)) == 18 * 10 ** 30
+        assert gate.total_received_since("a", datetime.fromtimestamp(0)) == 19 * 10 ** 30 + 2 ** 127
+        assert gate.total_receivable("a") == 6 * 10 ** 30
+        assert [r.amount for r in index.receivable("a", 2 * 10 ** 30)] == [5 * 10 ** 30]
+
+        window = index.payments("a", datetime.fromtimestamp(newest - 5 * 60), datetime.fromtimestamp(newest - 60))
+        assert [p.time for p in window] == [datetime.fromtimestamp(newest - n * 60) for n in (3, 5)]
+        assert index.total_received("a", datetime.fromtimestamp(newest - 5 * 60), datetime.fromtimestamp(newest - 60)) == 2 * 10 ** 30
+        assert len(list(index.iter_received("a"))) == 20
+        assert index.received_batch("a").total() == 19 * 10 ** 30 + 2 ** 127
+
+        assert node.calls == []
+
+        # a payment in the second before a fractional bound is outside it, as on the scan path
+        paid = datetime.fromtimestamp(newest - 60)
+        half = timedelta(microseconds=500000)
+        assert gate.been_paid("a", 10 ** 30, since=paid + half) is None
+        assert gate.total_received_since("a", paid + half) == 0
+        assert gate.total_received_since("a", paid - half) == 10 ** 30
+        assert index.total_received("a", paid - timedelta(seconds=120), paid + half) == 2 * 10 ** 30
+
+        scan = xno_gate.Gate(rpc)
+        assert scan.been_paid("a", 10 ** 30, since=paid + half) is None
+        assert scan.total_received_since("a", paid + half) == 0
+
+
+def test_index_resumes_from_frontier(tmp_path):
+    """A restarted index only fetches blocks newer than the stored frontier."""
+    chain = make_chain(30)
+    path = tmp_path / "index.db"
+
+    with StandInRPC(serve(chain, [])) as node:
+        PaymentIndex(path, xno_gate.DefaultRPCInterface(node.url, None, lookback=10)).ingest("a")
+
+    newest = int(chain[0]["local_timestamp"])
+    chain.insert(0, history_block(7 * 10 ** 30, newest + 60, "F" * 64))
+
+    with StandInRPC(serve(chain, [])) as node:
+        index = PaymentIndex(path, xno_gate.DefaultRPCInterface(node.url, None, lookback=10))
+        index.ingest("a")
+
+        assert [call["action"] for call in node.calls] == ["account_history", "accounts_receivable"]
+        assert index.frontier("a") == ("F" * 64, newest + 60)
+        assert len(index.received("a")) == 16
+        assert index.last_paid("a", 7 * 10 ** 30) == datetime.fromtimestamp(newest + 60)
+
+
+def test_index_ingests_when_stale(tmp_path):
+    """With max_age, queries ingest first once the index is older than that."""
+    with StandInRPC(serve(make_chain(4), [])) as node:
+        index = PaymentIndex(tmp_path / "index.db", xno_gate.DefaultRPCInterface(node.url, None), max_age=60)
+
+        assert len(index.received("a")) == 2
+        assert len(index.received("a")) == 2
+        assert len(node.calls) == 2
+
+        index._ingested["a"] -= 61
+        index.received("a")
+        assert len(node.calls) == 4
+
+
+def test_index_keeps_lock_state(tmp_path):
+    index = PaymentIndex(tmp_path / "index.db")
+    index.save_lock_state(True, datetime.now() + timedelta(seconds=30))
+
+    assert PaymentIndex(tmp_path / "index.db").load_lock_state().unlocked is True
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import json
+import multiprocessing
+import struct
+
+import pytest
+
+from tests.factories import LockStateFactory
+from xno_gate.entities import LockState
+import xno_gate.gate as xno_gate
+from xno_gate.lockstate import JSONLockStore, MemoryLockStore, MmapLockStore, SQLiteLockStore
+
+
+@pytest.fixture(params=["json", "mmap", "sqlite"])
+def make_store(request, tmp_path):
+    """Build stores of one kind that share a backend."""
+    kinds = \
+        {
+            "json": lambda: JSONLockStore(tmp_path / "lock.json"),
+            "mmap": lambda: MmapLockStore(tmp_path / "lock.mmap"),
+            "sqlite": lambda: SQLiteLockStore(tmp_path / "lock.db"),
+        }
+
+    return kinds[request.param]
+
+
+def test_stores_share_verdicts(make_store):
+    """Verdicts saved by one store are loaded by another on the same backend, by gate name."""
+    saver = make_store()
+    loader = make_store()
+
+    assert loader.load() is None
+
+    first = LockStateFactory()
+    second = LockState(not first.unlocked, first.until + timedelta(seconds=5))
+    saver.save(first)
+    saver.save(second, "other")
+
+    for name, expect in [("default", first), ("other", second)]:
+        result = loader.load(name)
+        assert result.unlocked == expect.unlocked
+        assert result.until == expect.until
+
+    assert loader.load("missing") is None
+
+
+def test_store_hot_path_skips_backend(tmp_path):
+    """While the in-process verdict is in the future, the backend is not read."""
+    path = tmp_path / "lock.json"
+    store = JSONLockStore(path)
+    until = datetime.now() + timedelta(seconds=60)
+    store.save(LockState(True, until))
+
+    path.write_text("not json")
+    assert store.load().until == until
+
+    store.save(LockState(True, datetime.now() - timedelta(seconds=1)))
+    path.write_text("not json")
+    assert store.load() is None
+
+
+def test_json_store_reads_legacy_files(tmp_path):
+    """Cache files from before named gates still load."""
+    path = tmp_path / "lock.json"
+    until = datetime(2030, 1, 1, 12, 0, 0)
+    path.write_text(json.dumps({"unlocked": True, "until": until.timestamp()}))
+
+    assert JSONLockStore(path).load().until == until
+
+
+def write_verdict(path, n):
+    MmapLockStore(path).save(LockState(n % 2 == 0, datetime(2030, 1, 1) + timedelta(seconds=n)), f"gate-{n}")
+
+
+def test_mmap_store_shared_across_processes(tmp_path):
+    """Worker processes see each other's verdicts through the shared map."""
+    path = tmp_path / "lock.mmap"
+    MmapLockStore(path)
+
+    workers = [multiprocessing.Process(target=write_verdict, args=(path, n)) for n in range(4)]
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    store = MmapLockStore(path)
+
+    for n in range(4):
+        assert store.load(f"gate-{n}").until == datetime(2030, 1, 1) + timedelta(seconds=n)
+
+
+def test_mmap_store_survives_crashed_writer(tmp_path):
+    """A slot left mid-write reads as a miss instead of hanging readers, and the next save repairs it."""
+    path = tmp_path / "lock.mmap"
+    until = datetime(2030, 1, 1)
+    MmapLockStore(path).save(LockState(True, until), "gate")
+
+    # a writer that died after marking the slot busy leaves an odd sequence
+    reader = MmapLockStore(path)
+    offset = next(reader._slots_for(reader._hash("gate")))
+    struct.pack_into("<I", reader._map, offset, struct.unpack_from("<I", reader._map, offset)[0] | 1)
+
+    assert reader.load("gate") is None
+
+    MmapLockStore(path).save(LockState(False, until), "gate")
+    assert MmapLockStore(path).load("gate").until == until
+
+
+def test_interface_uses_lock_store():
+    """DefaultRPCInterface keeps its verdict in the given store, under its lock name."""
+    store = MemoryLockStore()
+    one = xno_gate.DefaultRPCInterface("Not a real proxy.", None, lock_store=store, lock_name="one")
+    two = xno_gate.DefaultRPCInterface("Not a real proxy.", None, lock_store=store, lock_name="two")
+
+    until = datetime.now() + timedelta(seconds=30)
+    one.save_lock_state(True, until)
+
+    assert one.load_lock_state().until == until
+    assert two.load_lock_state() is None
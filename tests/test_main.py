@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import time
 from tests.factories import KeyFactory, LockStateFactory, ReceivedFactory, ReceivableFactory
 from xno_gate.entities import LockState
 import xno_gate.gate as xno_gate
@@ -309,3 +311,213 @@ def test_gate_ignores_expired(unlocked_gate_with_cache):
 
     assert seconds_unlocked > timedelta(seconds=59) and seconds_unlocked <= timedelta(seconds=60)
     assert gate.xno_interface.load_lock_state().until == unlocked_until
+
+
+class SlowInterface(UnlockableInterface):
+    """UnlockableInterface with a delay on every lookup, counting calls."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    def received(self, account, threshold=10 ** 30):
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().received(account)
+
+    def receivable(self, account, threshold=10 ** 30):
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().receivable(account, threshold)
+
+
+class BatchingSlowInterface(SlowInterface):
+    """SlowInterface whose receivable_many is one batched lookup."""
+
+    receivable_batched = True
+
+    def receivable_many(self, accounts, threshold=10 ** 30):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {account: UnlockableInterface.receivable(self, account, threshold) for account in accounts}
+
+
+def test_gate_checks_keys_in_parallel():
+    """With an executor, key checks overlap instead of adding up, using receivables prefetched in one batched lookup."""
+    iface = BatchingSlowInterface(0.05)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        gate = xno_gate.Gate(iface, executor=executor)
+
+        for _ in range(10):
+            key = KeyFactory(receivable=True)
+            gate.add_key(key.account, key.amount, key.timeout, key.receivable)
+
+        start = time.monotonic()
+        assert gate.unlocked() is None
+        assert time.monotonic() - start < 0.5
+        assert iface.calls == 11
+
+
+def test_gate_checks_non_receivable_keys_in_parallel():
+    """Keys that ignore receivables skip the receivable lookup altogether."""
+    iface = SlowInterface(0.05)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        gate = xno_gate.Gate(iface, executor=executor)
+
+        for _ in range(10):
+            key = KeyFactory()
+            gate.add_key(key.account, key.amount, key.timeout)
+
+        start = time.monotonic()
+        assert gate.unlocked() is None
+        assert time.monotonic() - start < 0.3
+        assert iface.calls == 10
+
+
+def test_gate_batches_each_account_once():
+    """Several receivable keys on one account ask the batched lookup for that account once."""
+    iface = BatchingSlowInterface(0)
+    requested = []
+    receivable_many = iface.receivable_many
+    iface.receivable_many = lambda accounts, threshold=10 ** 30: requested.append(accounts) or receivable_many(accounts, threshold)
+    gate = xno_gate.Gate(iface)
+
+    for amount in [3000, 2000, 1000]:
+        gate.add_key("shared", amount, 60, receivable=True)
+
+    gate.add_key("other", 1000, 60, receivable=True)
+
+    assert gate.unlocked() is None
+    assert requested == [["shared", "other"]]
+
+
+def test_serial_gate_looks_up_receivables_key_by_key():
+    """Without a batched receivable lookup, the serial check stops at the first unlocking key rather than fetching every key's receivables up front."""
+    iface = SlowInterface(0)
+    gate = xno_gate.Gate(iface)
+
+    for n in range(20):
+        gate.add_key(f"account-{n}", 1000, 600 - n, receivable=True)
+
+    iface.add_receivable("account-0", ReceivableFactory(amount=5000))
+
+    assert gate.unlocked() is not None
+    assert iface.calls == 1
+
+
+def test_parallel_gate_prefers_longest_timeout():
+    """Parallel checks keep the serial outcome: the longest timeout key wins."""
+    iface = SlowInterface(0)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        gate = xno_gate.Gate(iface, executor=executor)
+
+        short_key = KeyFactory(timeout=5 * 60)
+        long_key = KeyFactory(timeout=15 * 60)
+        gate.add_key(short_key.account, short_key.amount, short_key.timeout)
+        gate.add_key(long_key.account, long_key.amount, long_key.timeout)
+
+        received = ReceivedFactory(amount=max(short_key.amount, long_key.amount) + 1, time=datetime.now())
+        iface.add_received(short_key.account, received)
+        iface.add_received(long_key.account, received)
+
+        difference = gate.unlocked() - datetime.now()
+        assert difference > timedelta(seconds=short_key.timeout) and difference <= timedelta(seconds=long_key.timeout)
+
+
+class OrderedInterface(FakeInterface):
+    """FakeInterface that promises newest first results and records how many it handed out."""
+
+    received_ordered = True
+
+    def __init__(self, received):
+        super().__init__(received, [])
+        self.produced = 0
+
+    def received(self, _):
+        for payment in self._received:
+            self.produced += 1
+            yield payment
+
+
+def test_gate_streams_ordered_interfaces():
+    """Ordered results are streamed, and the scan stops at the first match."""
+    iface = OrderedInterface(standard_payments)
+    gate = xno_gate.Gate(iface)
+    [p1, p2, p3] = standard_payments
+
+    assert gate.been_paid("a", 2000) == p2.time
+    assert iface.produced == 2
+
+    iface.produced = 0
+    assert gate.total_received_since("a", datetime(2024, 1, 1)) == p1.amount
+    assert iface.produced == 2
+
+
+def test_gate_sorts_unordered_interfaces():
+    """Interfaces without the guarantee are still sorted newest first."""
+    iface = FakeInterface(list(reversed(standard_payments)), [])
+    gate = xno_gate.Gate(iface)
+    [p1, p2, p3] = standard_payments
+
+    assert gate.been_paid("a", 1000) == p1.time
+
+
+class CountingInterface(FakeInterface):
+    """FakeInterface counting lookups."""
+
+    def __init__(self, received, receivable):
+        super().__init__(received, receivable)
+        self.lookups = 0
+
+    def received(self, account, count=10):
+        self.lookups += 1
+        return super().received(account, count)
+
+    def receivable(self, account, threshold=10 ** 30):
+        self.lookups += 1
+        return super().receivable(account, threshold)
+
+
+def test_tiers_share_one_fetch():
+    """Several keys on one account are tiers, checked against one history fetch."""
+    now = datetime.now().replace(microsecond=0)
+    hour, day = 60 * 60, 24 * 60 * 60
+    payments = [ReceivedFactory(amount=10 ** 30, time=now - timedelta(minutes=10)), ReceivedFactory(amount=10 * 10 ** 30, time=now - timedelta(hours=2))]
+    iface = CountingInterface(payments, [])
+    gate = xno_gate.Gate(iface)
+
+    gate.add_key("a", 10 ** 30, hour)
+    gate.add_key("a", 10 * 10 ** 30, day)
+    gate.add_key("a", 50 * 10 ** 30, 7 * day)
+
+    assert len(gate.keys["a"]) == 3
+    assert gate.check() == now - timedelta(hours=2) + timedelta(days=1)
+    assert iface.lookups == 1
+
+    iface.lookups = 0
+    assert gate.check(now + timedelta(hours=23)) is None
+    assert iface.lookups == 1
+
+    # once the day tier's payment is too old, the hour tier still holds
+    payments[1].time = now - timedelta(hours=25)
+    assert gate.check(now) == now + timedelta(minutes=50)
+
+
+def test_tiers_replace_and_accept():
+    """Re-adding a tier replaces it, and pushed payments unlock by the longest tier they pay for."""
+    now = datetime.now().replace(microsecond=0)
+    gate = xno_gate.Gate(CountingInterface([], [ReceivableFactory(amount=10 ** 30)]))
+
+    gate.add_key("a", 10 ** 30, 60)
+    gate.add_key("a", 10 ** 30, 60, receivable=True)
+    gate.add_key("a", 10 * 10 ** 30, 600)
+
+    assert [(key.timeout, key.receivable) for key in gate.keys["a"]] == [(600, False), (60, True)]
+    assert gate.check(now) == now + timedelta(seconds=60)
+
+    assert gate.accept("a", ReceivedFactory(amount=10 * 10 ** 30, time=now)) == now + timedelta(seconds=600)
+    assert gate.accept("a", ReceivedFactory(amount=10 ** 30, time=now)) == now + timedelta(seconds=600)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+from tests.factories import ReceivedFactory
+from tests.rpc_server import StandInRPC
+from tests.test_main import UnlockableInterface
+import xno_gate.gate as xno_gate
+from xno_gate.metrics import CallbackInstrumentation, Metrics
+
+
+def test_gate_reports_decisions():
+    """The gate reports cache hits and misses, keys evaluated and the unlocking key."""
+    metrics = Metrics()
+    iface = UnlockableInterface(rate_limit=60)
+    gate = xno_gate.Gate(iface, instrumentation=metrics)
+
+    gate.add_key("long", 1000, 900)
+    gate.add_key("short", 1000, 300)
+    iface.add_received("short", ReceivedFactory(amount=5000, time=datetime.now()))
+
+    gate.unlocked()
+    gate.unlocked()
+
+    assert metrics.counter("lock_state_cache_total", result="miss") == 1
+    assert metrics.counter("lock_state_cache_total", result="hit") == 1
+    assert metrics.counter("unlocked_by_total", account="short", timeout="300") == 1
+
+    exposed = metrics.expose()
+    assert "# TYPE xno_gate_keys_evaluated histogram" in exposed
+    assert 'xno_gate_keys_evaluated_bucket{le="2"} 1' in exposed
+    assert "xno_gate_keys_evaluated_sum 2" in exposed
+
+
+def test_rpc_reports_round_trips(tmp_path):
+    """The interface reports each RPC action's latency, decode time and size."""
+    events = list()
+    body = {"blocks": {"B" * 64: "2000"}}
+
+    with StandInRPC(lambda rpc_call: body) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json",
+                                           instrumentation=CallbackInstrumentation(lambda event, **fields: events.append((event, fields))))
+        rpc.receivable("a")
+
+    assert [event for event, _ in events] == ["rpc", "decode"]
+    assert events[0][1]["action"] == "receivable"
+    assert events[0][1]["size"] > 0
+
+    metrics = Metrics()
+    metrics.rpc("receivable", 0.003, 120)
+    exposed = metrics.expose()
+    assert 'xno_gate_rpc_seconds_bucket{action="receivable",le="0.0025"} 0' in exposed
+    assert 'xno_gate_rpc_seconds_bucket{action="receivable",le="0.005"} 1' in exposed
+    assert 'xno_gate_rpc_received_bytes_total{action="receivable"} 120' in exposed
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from datetime import datetime, timedelta
+import threading
+import time
+
+from tests.test_main import UnlockableInterface
+from xno_gate.entities import LockState, Received
+from xno_gate.middleware import ASGIGateMiddleware, GateMiddleware, GateVerdicts
+import xno_gate.gate as xno_gate
+
+
+class BlockingInterface(UnlockableInterface):
+    """Hold every received() lookup until released, as a slow RPC node would."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.lookups = 0
+
+    def received(self, account, threshold=10 ** 30):
+        self.lookups += 1
+        self.started.set()
+        self.release.wait(5)
+        return super().received(account)
+
+
+def wsgi_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"content"]
+
+
+def wsgi_get(app, path):
+    response = dict()
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    body = b"".join(app({"PATH_INFO": path}, start_response))
+    return response["status"], response["headers"], body
+
+
+def paid_gate(iface):
+    gate = xno_gate.Gate(iface)
+    gate.add_key("nano_a", 10 ** 30, 600)
+    return gate
+
+
+def test_wsgi_never_waits_on_the_rpc():
+    """Requests are answered from memory while the verdict refreshes in the background."""
+    iface = BlockingInterface()
+    iface.add_received("nano_a", Received(10 ** 30, datetime.now()))
+    verdicts = GateVerdicts()
+    app = GateMiddleware(wsgi_app, {"/paid": paid_gate(iface)}, verdicts)
+
+    # nothing known yet: locked, without waiting on the blocked lookup
+    assert wsgi_get(app, "/paid/article")[0].startswith("402")
+    assert wsgi_get(app, "/paid")[0].startswith("402")
+    assert wsgi_get(app, "/free")[0] == "200 OK"
+    assert wsgi_get(app, "/paidfor")[0] == "200 OK"
+
+    iface.release.set()
+    verdicts.join(5)
+
+    status, headers, body = wsgi_get(app, "/paid/article")
+    assert (status, body) == ("200 OK", b"content")
+    assert 590 <= int(headers["Cache-Control"].split("=")[1]) <= 600
+    assert headers["Expires"].endswith("GMT")
+    assert iface.lookups == 1
+
+
+def test_verdict_seeded_from_lock_state():
+    """A saved verdict answers the first request with no RPC call."""
+    iface = BlockingInterface()
+    until = datetime.now() + timedelta(seconds=300)
+    iface._lock_state = LockState(True, until)
+    verdicts = GateVerdicts()
+    gate = paid_gate(iface)
+
+    assert verdicts.verdict(gate) == until
+    assert iface.lookups == 0
+
+
+def test_stale_verdict_served_while_revalidating():
+    """A lapsing unlocked verdict is rechecked ahead of time and kept until it lapses."""
+    iface = BlockingInterface()
+    until = datetime.now() + timedelta(seconds=3)
+    iface._lock_state = LockState(True, until)
+    verdicts = GateVerdicts(lead=5)
+    gate = paid_gate(iface)
+
+    assert verdicts.verdict(gate) == until
+    assert iface.started.wait(5)
+    assert verdicts.verdict(gate) == until
+    assert iface.lookups == 1
+
+    iface.add_received("nano_a", Received(10 ** 30, datetime.now()))
+    iface.release.set()
+    verdicts.join(5)
+
+    assert verdicts.verdict(gate) > until + timedelta(seconds=500)
+
+
+def test_first_verdict_wait_is_bounded():
+    """With first_wait, a gate with no saved verdict answers its first request from its first refresh, waiting no longer than first_wait."""
+    iface = UnlockableInterface()
+    iface.add_received("nano_a", Received(10 ** 30, datetime.now()))
+    app = GateMiddleware(wsgi_app, {"/paid": paid_gate(iface)}, GateVerdicts(first_wait=5))
+
+    assert wsgi_get(app, "/paid")[0] == "200 OK"
+
+    blocked = BlockingInterface()
+    blocked.add_received("nano_a", Received(10 ** 30, datetime.now()))
+    verdicts = GateVerdicts(first_wait=0.1)
+    gate = paid_gate(blocked)
+
+    began = time.monotonic()
+    assert verdicts.verdict(gate) is None
+    assert time.monotonic() - began < 1
+
+    blocked.release.set()
+    verdicts.join(5)
+    assert verdicts.verdict(gate) is not None
+
+    async def first():
+        return await GateVerdicts(first_wait=5).verdict_async(paid_gate(iface))
+
+    assert asyncio.run(first()) is not None
+
+
+def test_asgi_gates_http_routes():
+    iface = UnlockableInterface()
+    iface.add_received("nano_a", Received(10 ** 30, datetime.now()))
+    verdicts = GateVerdicts()
+    gate = paid_gate(iface)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"cache-control", b"private")]})
+        await send({"type": "http.response.body", "body": b"content"})
+
+    middleware = ASGIGateMiddleware(app, {"/paid/": gate}, verdicts)
+
+    async def get(path):
+        sent = list()
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware({"type": "http", "path": path}, None, send)
+        return sent[0]["status"], dict(sent[0]["headers"])
+
+    assert asyncio.run(get("/paid/x"))[0] == 402
+
+    verdicts.join(5)
+    status, headers = asyncio.run(get("/paid/x"))
+
+    assert status == 200
+    assert headers[b"cache-control"] == b"private"
+    assert b"expires" in headers
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from tests.rpc_server import StandInRPC
+import xno_gate.gate as xno_gate
+from xno_gate.ratelimit import RateLimitExceeded, TokenBucket
+
+
+def receivable(rpc_call):
+    return {"blocks": {"B" * 64: "2000"}}
+
+
+def test_bucket_queues_calls_over_budget():
+    """Calls past the burst wait for tokens instead of failing."""
+    bucket = TokenBucket(rate=50, burst=5, max_wait=1)
+
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+
+    assert 0.08 < time.monotonic() - start < 0.5
+    stats = bucket.stats()
+    assert stats["acquired"] == 10
+    assert stats["throttled"] == 5
+    assert stats["waited"] > 0.08
+
+
+def test_bucket_bounds_the_wait():
+    """A call that would wait longer than max_wait is rejected."""
+    bucket = TokenBucket(rate=1, burst=1, max_wait=0.1)
+    bucket.acquire()
+
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire()
+
+    assert bucket.stats()["rejected"] == 1
+
+
+def test_interface_coalesces_identical_calls(tmp_path):
+    """Identical calls in flight at the same time share one request, within the rate limit."""
+    bucket = TokenBucket(rate=100)
+
+    with StandInRPC(receivable, latency=0.1) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", rate_limiter=bucket)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: [r.amount for r in rpc.receivable("a")], range(8)))
+
+        assert results == [[2000]] * 8
+        assert len(node.calls) == 1
+        assert bucket.stats()["acquired"] == 1
+
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", coalesce=False)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: rpc.receivable("a"), range(4)))
+
+        assert len(node.calls) == 5
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+from tests.factories import ReceivedFactory, ReceivableFactory
+from tests.rpc_server import StandInRPC, account_history, history_block, make_chain
+from tests.test_main import SlowInterface
+from xno_gate.gate import DefaultRPCInterface, Gate
+from xno_gate.lockstate import MemoryLockStore
+from xno_gate.registry import GateRegistry
+
+
+def test_registry_shares_lookups():
+    """Gates watching the same account share its lookups, and keep their own verdicts."""
+    inner = SlowInterface(0)
+    inner.add_received("shared", ReceivedFactory(amount=5000, time=datetime.now()))
+    registry = GateRegistry(inner)
+
+    for n in range(5):
+        registry.add_gate(f"cheap-{n}").add_key("shared", 1000, 60)
+        registry.add_gate(f"dear-{n}").add_key("shared", 9000, 60)
+
+    assert sorted(registry.due()) == sorted(registry.gates)
+
+    verdicts = registry.refresh_due()
+
+    assert inner.calls == 1
+    assert all(verdicts[f"cheap-{n}"] is not None for n in range(5))
+    assert all(verdicts[f"dear-{n}"] is None for n in range(5))
+    assert registry.due() == []
+    assert registry.unlocked("cheap-0") == verdicts["cheap-0"]
+    assert registry.unlocked("dear-0") is None
+
+
+def test_registry_batches_receivables():
+    """Receivable keys across all due gates cost one batched lookup."""
+
+    class CountingInterface(SlowInterface):
+
+        def receivable_many(self, accounts, threshold=10 ** 30):
+            self.batches = getattr(self, "batches", 0) + 1
+            return super().receivable_many(accounts, threshold)
+
+    inner = CountingInterface(0)
+    inner.add_receivable("a", ReceivableFactory(amount=5000))
+    store = MemoryLockStore()
+    registry = GateRegistry(inner, lock_store=store, rate_limit=30)
+
+    registry.add_gate("one").add_key("a", 1000, 60, receivable=True)
+    registry.add_gate("two").add_key("b", 1000, 60, receivable=True)
+    registry.add_gate("three").add_key("a", 9000, 60, receivable=True)
+
+    verdicts = registry.refresh_due()
+
+    assert inner.batches == 1
+    assert verdicts["one"] is not None
+    assert verdicts["two"] is None and verdicts["three"] is None
+
+    locked = store.load("two").until - datetime.now()
+    assert timedelta(seconds=29) < locked <= timedelta(seconds=30)
+
+
+def test_registry_reads_deep_history():
+    """A long timeout key on a busy account finds a payment many pages back, as a standalone gate does, reading the history once for every gate."""
+    start = int(datetime.now().timestamp()) - 3000
+    chain = make_chain(40, start=start)
+    chain.append(history_block(5 * 10 ** 30, start - 60, "F" * 64))
+
+    with StandInRPC(account_history(chain)) as node:
+        rpc = DefaultRPCInterface(node.url, None, lookback=10)
+        registry = GateRegistry(rpc)
+
+        for name in ["x", "y"]:
+            registry.add_gate(name).add_key("busy", 5 * 10 ** 30, 3600)
+
+        iface = registry["x"].xno_interface
+        assert iface.received_ordered and iface.received_columnar and iface.receivable_aggregates and not iface.received_indexed
+
+        until = datetime.fromtimestamp(start - 60) + timedelta(seconds=3600)
+        assert registry.add_gate("x").been_paid("busy", 5 * 10 ** 30, since=datetime.fromtimestamp(start - 3600)) == datetime.fromtimestamp(start - 60)
+        assert registry.refresh_due() == {"x": until, "y": until}
+        assert len(node.calls) == 5
+
+        standalone = Gate(rpc)
+        standalone.add_key("busy", 5 * 10 ** 30, 3600)
+        assert standalone.unlocked() == until
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import random
+import threading
+import time
+
+from tests.test_main import OrderedInterface
+from xno_gate.entities import Received
+from xno_gate.rollup import RollupStore
+import xno_gate.gate as xno_gate
+
+START = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def payments(count, seed=7):
+    """Payments newest first, spread over about ten days, some sharing a second."""
+    rng = random.Random(seed)
+    times = sorted((START + timedelta(seconds=rng.randrange(10 * 24 * 60 * 60)) for _ in range(count)), reverse=True)
+    times[1] = times[0]
+    return [Received(rng.randrange(1, 10 ** 31) + 2 ** 100, when) for when in times]
+
+
+def brute_total(received, start, end):
+    return sum(payment.amount for payment in received if start <= payment.time < end)
+
+
+def test_window_totals_are_exact():
+    """Totals from buckets match a scan, for windows of any alignment and length."""
+    received = payments(500)
+    store = RollupStore()
+    store.add("a", received)
+    rng = random.Random(3)
+
+    for _ in range(300):
+        start = START + timedelta(seconds=rng.randrange(-3600, 11 * 24 * 60 * 60))
+        end = start + timedelta(seconds=rng.choice([1, 59, 61, 3599, 3601, 86400, 3 * 86400 + 17, rng.randrange(12 * 86400)]))
+        assert store.total("a", start, end) == brute_total(received, start, end)
+
+    # fractional edges: a payment on the second before a window's start is outside it, one on the second before its end is inside
+    for payment in received[:50]:
+        for offset in (-0.5, 0, 0.5):
+            start = payment.time + timedelta(seconds=offset)
+            end = start + timedelta(seconds=rng.choice([0.5, 1.5, 60.25, 3600.75]))
+            assert store.total("a", start, end) == brute_total(received, start, end)
+            assert store.total("a", end - timedelta(days=1), start) == brute_total(received, end - timedelta(days=1), start)
+
+    assert store.total("a", START) == sum(payment.amount for payment in received)
+    assert store.total("b", START) == 0
+
+
+def test_sync_adds_only_new_payments():
+    """Incremental syncs read newest first and stop at what is already rolled up, counting payments that share a second."""
+    received = payments(50)
+    iface = OrderedInterface(received[3:])
+    store = RollupStore()
+    store.sync("a", iface)
+
+    iface._received = received
+    iface.produced = 0
+    store.sync("a", iface)
+
+    assert store.total("a", START) == sum(payment.amount for payment in received)
+    assert iface.produced == 5
+
+
+def test_gate_histogram():
+    """Gate.received_histogram gives the same answer from rollups as from a scan."""
+    received = payments(300)
+    end = START + timedelta(days=10)
+
+    scanned = xno_gate.Gate(OrderedInterface(received))
+    rolled = xno_gate.Gate(OrderedInterface(received), rollups=RollupStore())
+
+    for bucket in (timedelta(hours=1), timedelta(days=1), timedelta(minutes=90)):
+        histogram = rolled.received_histogram("a", START, end, bucket)
+
+        assert histogram == scanned.received_histogram("a", START, end, bucket)
+        assert histogram[0][0] == START
+        assert sum(total for _, total in histogram) == sum(payment.amount for payment in received)
+
+    since = START + timedelta(days=4, seconds=17)
+    assert rolled.total_received_since("a", since) == scanned.total_received_since("a", since)
+
+    since = received[100].time + timedelta(microseconds=500000)
+    assert rolled.total_received_since("a", since) == scanned.total_received_since("a", since)
+
+    start = START + timedelta(seconds=0.5)
+    assert rolled.received_histogram("a", start, end, timedelta(hours=1)) == scanned.received_histogram("a", start, end, timedelta(hours=1))
+
+
+def test_refresh_respects_max_age():
+    iface = OrderedInterface(payments(10))
+    store = RollupStore(max_age=60)
+
+    store.refresh("a", iface)
+    iface.produced = 0
+    store.refresh("a", iface)
+
+    assert iface.produced == 0
+
+
+def test_sync_reads_history_outside_the_lock():
+    """A slow history lookup for one account doesn't hold up others, and racing syncs of an account add each payment once."""
+    received = payments(20)
+
+    class BlockingInterface(OrderedInterface):
+
+        def __init__(self, received):
+            super().__init__(received)
+            self.reading = threading.Event()
+            self.release = threading.Event()
+
+        def received(self, account):
+            if account == "slow":
+                self.reading.set()
+                self.release.wait(5)
+
+            yield from super().received(account)
+
+    iface = BlockingInterface(received)
+    store = RollupStore()
+    slow = threading.Thread(target=store.sync, args=("slow", iface))
+    slow.start()
+    assert iface.reading.wait(5)
+
+    began = time.monotonic()
+    store.sync("fast", iface)
+    store.sync("slow", OrderedInterface(received))
+    assert time.monotonic() - began < 1
+    assert store.total("fast", START) == store.total("slow", START)
+
+    iface.release.set()
+    slow.join()
+
+    assert store.total("slow", START) == sum(payment.amount for payment in received)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+from tests.rpc_server import StandInRPC, account_history, make_chain
+import xno_gate.gate as xno_gate
+
+
+def accounts_receivable(rpc_call):
+    """Answer accounts_receivable: every account has two blocks, filtered by threshold."""
+    threshold = int(rpc_call["threshold"])
+    blocks = dict()
+
+    for n, account in enumerate(rpc_call["accounts"]):
+        amounts = {f"{n:02d}A": 10 ** 30 * (n + 1), f"{n:02d}B": 10}
+        found = {h: str(a) for h, a in amounts.items() if a >= threshold}
+        blocks[account] = found or ""
+
+    return {"blocks": blocks}
+
+
+def balances(rpc_call):
+    """Answer account_balance and accounts_balances to match accounts_receivable, listing account "x" as an error."""
+    def balance(n):
+        return {"balance": "0", "receivable": str(10 ** 30 * (n + 1) + 10)}
+
+    if rpc_call["action"] == "account_balance":
+        return balance(0)
+
+    accounts = rpc_call["accounts"]
+    return \
+        {
+            "balances": {account: balance(n) for n, account in enumerate(accounts) if account != "x"},
+            "errors": {account: "Account not found" for account in accounts if account == "x"},
+        }
+
+
+def test_receivable_many(tmp_path):
+    """Receivables for several accounts come from a single RPC call."""
+
+    with StandInRPC(accounts_receivable) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json")
+        result = rpc.receivable_many(["a", "b", "c"], 2 * 10 ** 30)
+
+        assert len(node.calls) == 1
+        assert {account: [r.amount for r in rec] for account, rec in result.items()} == \
+            {"a": [], "b": [2 * 10 ** 30], "c": [3 * 10 ** 30]}
+
+
+def test_gate_batches_receivable_keys(tmp_path):
+    """A gate with N receivable keys costs one receivable request, not N."""
+
+    def respond(rpc_call):
+        if rpc_call["action"] == "accounts_receivable":
+            return accounts_receivable(rpc_call)
+
+        if rpc_call["action"] == "accounts_balances":
+            return balances(rpc_call)
+
+        return {"history": ""}
+
+    with StandInRPC(respond) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json")
+        gate = xno_gate.Gate(rpc)
+
+        for account in ["a", "b", "c"]:
+            gate.add_key(account, 10 * 10 ** 30, 60, receivable=True)
+
+        assert gate.unlocked() is None
+        assert [call["action"] for call in node.calls].count("accounts_receivable") == 1
+        assert gate.total_receivable_many(["a", "b"]) == {"a": 10 ** 30 + 10, "b": 2 * 10 ** 30 + 10}
+
+
+def test_history_pages_only_as_needed(tmp_path):
+    """Streaming queries stop fetching pages once they have their answer."""
+    chain = make_chain(100)
+    newest = int(chain[0]["local_timestamp"])
+
+    with StandInRPC(account_history(chain)) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", lookback=10)
+        gate = xno_gate.Gate(rpc)
+
+        # the last 5 minutes fit in the first page
+        assert gate.total_received_since("a", datetime.fromtimestamp(newest - 5 * 60)) == 3 * 10 ** 30
+        assert len(node.calls) == 1
+
+        # 35 minutes back spans 4 pages
+        node.calls.clear()
+        assert gate.total_received_since("a", datetime.fromtimestamp(newest - 35 * 60)) == 18 * 10 ** 30
+        assert len(node.calls) == 4
+
+        node.calls.clear()
+        assert gate.been_paid("a", 10 ** 30) == datetime.fromtimestamp(newest - 60)
+        assert len(node.calls) == 1
+
+        # without a cutoff, only one lookup is searched
+        node.calls.clear()
+        assert gate.been_paid("a", 2 * 10 ** 30) is None
+        assert len(node.calls) == 1
+
+        node.calls.clear()
+        assert gate.been_paid("a", 2 * 10 ** 30, since=datetime.fromtimestamp(newest - 15 * 60)) is None
+        assert len(node.calls) == 2
+
+        node.calls.clear()
+        assert gate.been_paid("a", 2 * 10 ** 30, since=datetime.fromtimestamp(0)) is None
+        assert len(node.calls) == 10
+
+
+def test_history_depth_bounds_paging(tmp_path):
+    """history_depth caps how far back iter_received pages."""
+    with StandInRPC(account_history(make_chain(100))) as node:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", lookback=10, history_depth=25)
+        assert len(list(rpc.iter_received("a"))) == 12
+        assert len(node.calls) == 3
+
+
+def test_receivable_aggregates(tmp_path):
+    """Existence checks ask for one block, and totals come from balances rather than listing blocks."""
+
+    def respond(rpc_call):
+        if rpc_call["action"] == "receivable":
+            blocks = {f"{n:064X}": "10" for n in range(1000) if int(rpc_call["threshold"]) <= 10}
+            return {"blocks": dict(list(blocks.items())[:int(rpc_call.get("count", 1000))]) or ""}
+
+        return balances(rpc_call)
+
+    with StandInRPC(respond) as node:
+        gate = xno_gate.Gate(xno_gate.DefaultRPCInterface(node.url, None))
+
+        assert gate.has_receivable("a", 10)
+        assert not gate.has_receivable("a", 11)
+        assert [call.get("count") for call in node.calls] == ["1", "1"]
+
+        node.calls.clear()
+        assert gate.total_receivable("a") == 10 ** 30 + 10
+        assert gate.total_receivable_many(["a", "x", "b"]) == {"a": 10 ** 30 + 10, "x": 10 ** 30 + 10, "b": 3 * 10 ** 30 + 10}
+        assert [call["action"] for call in node.calls] == ["account_balance", "accounts_balances", "account_balance"]
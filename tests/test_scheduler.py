@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import threading
+
+from tests.factories import ReceivedFactory
+from tests.test_main import SlowInterface
+import xno_gate.gate as xno_gate
+from xno_gate.scheduler import LockScheduler
+
+
+def test_scheduler_refreshes_ahead_of_expiry():
+    """The verdict is refreshed before it expires, and callbacks fire on each change."""
+    iface = SlowInterface(0)
+    iface.rate_limit = 60
+    gate = xno_gate.Gate(iface)
+    gate.add_key("a", 1000, 600)
+
+    events = list()
+    scheduler = LockScheduler(lead=5, spread=0, on_unlock=lambda *e: events.append(("unlock",) + e),
+                              on_lock=lambda *e: events.append(("lock",) + e))
+
+    start = datetime.now()
+    iface.add_received("a", ReceivedFactory(amount=5000, time=start))
+    scheduler.add("a", gate, now=start)
+
+    assert scheduler.run_pending(start) == 1
+    until = start + timedelta(seconds=600)
+    assert events == [("unlock", "a", until)]
+
+    # not due yet
+    assert scheduler.run_pending(until - timedelta(seconds=6)) == 0
+
+    # due: nothing holds it open past expiry, so no lookups happen at expiry
+    assert scheduler.run_pending(until - timedelta(seconds=5)) == 1
+    assert gate.unlocked() == until
+    calls = iface.calls
+
+    assert scheduler.run_pending(until) == 1
+    assert iface.calls == calls
+    assert events[-1][:2] == ("lock", "a")
+    assert gate.unlocked() is None
+
+
+def test_scheduler_extends_unlocked_gates():
+    """A payment made while unlocked extends the verdict before it expires, without a lock in between."""
+    iface = SlowInterface(0)
+    iface.rate_limit = 60
+    gate = xno_gate.Gate(iface)
+    gate.add_key("a", 1000, 600)
+
+    events = list()
+    scheduler = LockScheduler(lead=5, spread=0, on_lock=lambda *e: events.append(e))
+
+    start = datetime.now() - timedelta(seconds=300)
+    iface.add_received("a", ReceivedFactory(amount=5000, time=start))
+    scheduler.add("a", gate, now=start)
+    scheduler.run_pending(start)
+
+    iface.add_received("a", ReceivedFactory(amount=5000, time=datetime.now()))
+    scheduler.run_pending(start + timedelta(seconds=595))
+
+    assert gate.unlocked() > datetime.now() + timedelta(seconds=590)
+    assert events == []
+
+
+def test_scheduler_keeps_unlocks_accepted_before_expiry():
+    """A payment accepted after the lookahead check keeps the gate open at expiry, instead of being overwritten by the lock."""
+    iface = SlowInterface(0)
+    iface.rate_limit = 60
+    gate = xno_gate.Gate(iface)
+    gate.add_key("a", 1000, 600)
+
+    events = list()
+    scheduler = LockScheduler(lead=5, spread=0, on_lock=lambda *e: events.append(e))
+
+    start = datetime.now() - timedelta(seconds=300)
+    iface.add_received("a", ReceivedFactory(amount=5000, time=start))
+    scheduler.add("a", gate, now=start)
+    scheduler.run_pending(start)
+
+    # nothing holds the gate open past expiry yet, so it is set to lock then
+    until = start + timedelta(seconds=600)
+    scheduler.run_pending(until - timedelta(seconds=5))
+
+    renewed = gate.accept("a", ReceivedFactory(amount=5000, time=datetime.now()))
+    assert renewed > until
+
+    assert scheduler.run_pending(until) == 1
+    assert gate.unlocked() == renewed
+    assert iface.load_lock_state().unlocked
+    assert events == []
+
+    # rescheduled ahead of the new expiry
+    assert scheduler.run_pending(renewed - timedelta(seconds=6)) == 0
+    assert scheduler.run_pending(renewed - timedelta(seconds=5)) == 1
+
+
+def test_scheduler_thread_fires_callbacks():
+    """In the background, gates are refreshed as they come due."""
+    iface = SlowInterface(0)
+    gate = xno_gate.Gate(iface)
+    gate.add_key("a", 1000, 600)
+    iface.add_received("a", ReceivedFactory(amount=5000, time=datetime.now()))
+
+    unlocked = threading.Event()
+    scheduler = LockScheduler(spread=0.05, on_unlock=lambda *e: unlocked.set())
+    scheduler.start()
+    scheduler.add("a", gate)
+
+    assert unlocked.wait(2)
+    scheduler.stop()
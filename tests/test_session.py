@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from tests.rpc_server import StandInRPC, history_block
+import xno_gate.gate as xno_gate
+from xno_gate.session import RPCSession
+
+
+def respond(rpc_call):
+    if rpc_call["action"] == "account_history":
+        return {"history": [history_block(10 ** 30, 1727070138, "A" * 64)]}
+
+    return {"blocks": {"B" * 64: "2000"}}
+
+
+def test_session_reuses_connections(tmp_path):
+    """Interfaces sharing a session should share its warm connections."""
+
+    with StandInRPC(respond) as node, RPCSession(pool_size=2) as session:
+        first = xno_gate.DefaultRPCInterface(node.url, tmp_path / "one.json", session=session)
+        second = xno_gate.DefaultRPCInterface(node.url, tmp_path / "two.json", session=session)
+
+        for _ in range(3):
+            assert [r.amount for r in first.received("a")] == [10 ** 30]
+            assert [r.amount for r in second.receivable("a")] == [2000]
+
+        assert len(node.calls) == 6
+        assert len(node.connections) == 1
+
+
+def test_session_retries_server_errors(tmp_path):
+    """Retryable statuses should be retried before the interface gives up."""
+
+    attempts = list()
+
+    def flaky(rpc_call):
+        attempts.append(rpc_call)
+
+        if len(attempts) < 3:
+            return 503, {"error": "busy"}
+
+        return respond(rpc_call)
+
+    with StandInRPC(flaky) as node, RPCSession(retries=3, backoff=0) as session:
+        rpc = xno_gate.DefaultRPCInterface(node.url, tmp_path / "cache.json", session=session, timeout=5)
+        assert [r.amount for r in rpc.receivable("a")] == [2000]
+        assert len(attempts) == 3
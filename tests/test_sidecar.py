@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import threading
+
+import pytest
+
+from tests.rpc_server import StandInRPC, account_history, history_block
+from xno_gate.sidecar import GateClient, GateServer, registry_from_config
+
+
+def config(url):
+    return \
+        {
+            "proxy": url,
+            "gates": {
+                "paid": [{"account": "nano_a", "amount": 10 ** 30, "timeout": 600}],
+                "unpaid": [{"account": "nano_a", "amount": 5 * 10 ** 30, "timeout": 600, "receivable": True}],
+            },
+        }
+
+
+def respond_with(now):
+    history = account_history([history_block(10 ** 30, int(now.timestamp()), "A" * 64)])
+
+    def respond(rpc_call):
+        if rpc_call["action"] == "accounts_receivable":
+            return {"blocks": {account: "" for account in rpc_call["accounts"]}}
+
+        return history(rpc_call)
+
+    return respond
+
+
+def test_workers_share_one_daemon(tmp_path):
+    """Many clients get verdicts over the socket while the RPC is only asked once per gate."""
+    now = datetime.now().replace(microsecond=0)
+
+    with StandInRPC(respond_with(now)) as node:
+        server = GateServer(tmp_path / "gate.sock", registry_from_config(config(node.url)))
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+
+        try:
+            answers = list()
+
+            def worker():
+                client = GateClient(tmp_path / "gate.sock")
+
+                for _ in range(20):
+                    answers.append((client.unlocked("paid"), client.unlocked("unpaid")))
+
+                client.close()
+
+            workers = [threading.Thread(target=worker) for _ in range(4)]
+
+            for w in workers:
+                w.start()
+
+            for w in workers:
+                w.join()
+
+            assert set(answers) == {(datetime.fromtimestamp(now.timestamp() + 600), None)}
+            assert len(node.calls) <= 4
+
+            with pytest.raises(ValueError, match="unknown gate"):
+                GateClient(tmp_path / "gate.sock").unlocked("missing")
+        finally:
+            server.shutdown()
+            thread.join()
+
+    assert not (tmp_path / "gate.sock").exists()
+
+
+def test_client_reconnects(tmp_path):
+    """A client survives the daemon restarting between requests."""
+    now = datetime.now().replace(microsecond=0)
+
+    with StandInRPC(respond_with(now)) as node:
+        client = GateClient(tmp_path / "gate.sock")
+
+        for _ in range(2):
+            server = GateServer(tmp_path / "gate.sock", registry_from_config(config(node.url)))
+            thread = threading.Thread(target=server.serve, daemon=True)
+            thread.start()
+
+            try:
+                assert client.unlocked("paid") is not None
+                assert list(server.connections)
+            finally:
+                server.shutdown()
+                thread.join()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import json
+import time
+
+import pytest
+
+from tests.test_main import UnlockableInterface
+import xno_gate.gate as xno_gate
+from xno_gate.subscriber import ConfirmationSubscriber
+
+
+def confirmation(account, amount, subtype, link_as_account=None, when=None):
+    """Build a confirmation message, per the websocket spec."""
+    return \
+        {
+            "topic": "confirmation",
+            "time": str(int((when or datetime.now()).timestamp() * 1000)),
+            "message": {
+                "account": account,
+                "amount": str(amount),
+                "hash": "A" * 64,
+                "confirmation_type": "active_quorum",
+                "block": {"type": "state", "subtype": subtype, "link_as_account": link_as_account or account},
+            },
+        }
+
+
+def make_gate(receivable=False):
+    gate = xno_gate.Gate(UnlockableInterface(rate_limit=60))
+    gate.add_key("nano_gate", 1000, 600, receivable)
+    return gate
+
+
+def test_subscriber_converts_confirmations():
+    """Receives by a watched account unlock the gate; sends to it only do for receivable keys."""
+    gate = make_gate()
+    subscriber = ConfirmationSubscriber(gate, "ws://unused")
+
+    assert subscriber.handle(json.dumps(confirmation("nano_other", 5000, "receive"))) is None
+    assert subscriber.handle(json.dumps(confirmation("nano_gate", 500, "receive"))) is None
+    assert subscriber.handle(json.dumps(confirmation("nano_payer", 5000, "send", "nano_gate"))) is None
+    assert subscriber.handle("not json") is None
+    assert gate.xno_interface.load_lock_state() is None
+
+    until = subscriber.handle(json.dumps(confirmation("nano_gate", 5000, "receive")))
+    assert timedelta(seconds=599) < until - datetime.now() <= timedelta(seconds=600)
+    assert gate.unlocked() == until
+
+    # an older payment doesn't shorten the verdict
+    older = confirmation("nano_gate", 5000, "receive", when=datetime.now() - timedelta(seconds=60))
+    assert subscriber.handle(json.dumps(older)) == until
+
+    gate = make_gate(receivable=True)
+    subscriber = ConfirmationSubscriber(gate, "ws://unused")
+    assert subscriber.handle(json.dumps(confirmation("nano_payer", 5000, "send", "nano_gate"))) is not None
+
+
+def test_subscriber_listens_to_websocket():
+    """The subscriber subscribes to the gate's accounts and unlocks it on a confirmation."""
+    pytest.importorskip("websocket")
+    from tests.ws_server import StandInWebSocket
+
+    gate = make_gate()
+    messages = [{"ack": "subscribe"}, confirmation("nano_gate", 5000, "receive")]
+
+    with StandInWebSocket(messages) as node:
+        subscriber = ConfirmationSubscriber(gate, node.url, reconnect=0.05, timeout=2)
+        subscriber.start()
+
+        for _ in range(100):
+            if gate.xno_interface.load_lock_state():
+                break
+
+            time.sleep(0.01)
+
+        subscriber.stop()
+
+    assert node.received[0]["topic"] == "confirmation"
+    assert node.received[0]["options"]["accounts"] == ["nano_gate"]
+    assert gate.unlocked() > datetime.now() + timedelta(seconds=590)
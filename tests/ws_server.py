@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StandInWebSocket:
+
+    def __init__(self, messages):
+        """A local stand-in for a node's websocket. Each connection gets {messages} sent, as json text frames, once it has subscribed.
+
+        Arguments:
+            messages: Array of json-able messages.
+        """
+        self.messages = messages
+        self.received = list()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._socket.getsockname()
+        return f"ws://{host}:{port}/"
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+
+            threading.Thread(target=self._talk, args=(connection,), daemon=True).start()
+
+    def _talk(self, connection):
+        with connection:
+            request = b""
+
+            while b"\r\n\r\n" not in request:
+                request += connection.recv(4096)
+
+            headers = dict(line.split(": ", 1) for line in request.decode().split("\r\n")[1:] if ": " in line)
+            accept = base64.b64encode(hashlib.sha1((headers["Sec-WebSocket-Key"] + _GUID).encode()).digest()).decode()
+            connection.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                                f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+            self.received.append(json.loads(self._read_frame(connection)))
+
+            for message in self.messages:
+                self._send_frame(connection, json.dumps(message).encode())
+
+            try:
+                self._read_frame(connection)
+            except OSError:
+                return
+
+    @staticmethod
+    def _read_exactly(connection, n):
+        data = b""
+
+        while len(data) < n:
+            chunk = connection.recv(n - len(data))
+
+            if not chunk:
+                raise OSError("closed")
+
+            data += chunk
+
+        return data
+
+    def _read_frame(self, connection):
+        """Read one masked client frame."""
+        first, second = self._read_exactly(connection, 2)
+        length = second & 0x7f
+
+        if length == 126:
+            length = struct.unpack(">H", self._read_exactly(connection, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._read_exactly(connection, 8))[0]
+
+        mask = self._read_exactly(connection, 4)
+        payload = self._read_exactly(connection, length)
+        return bytes(b ^ mask[n % 4] for n, b in enumerate(payload))
+
+    @staticmethod
+    def _send_frame(connection, payload):
+        """Send one unmasked text frame."""
+        if len(payload) < 126:
+            header = struct.pack(">BB", 0x81, len(payload))
+        else:
+            header = struct.pack(">BBH", 0x81, 126, len(payload))
+
+        connection.sendall(header + payload)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._socket.close()
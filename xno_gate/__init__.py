@@ -3,6 +3,23 @@
 
 from .entities import *
 from .gate import *
+from .session import *
+from .decoding import *
+from .endpoints import *
+from .ratelimit import *
+from .history import *
+from .index import *
+from .rollup import *
+from .cache import *
+from .lockstate import *
+from .registry import *
+from .subscriber import *
+from .middleware import *
+from .scheduler import *
+from .sidecar import *
+from .metrics import *
+from .analytics import *
+from .aio import *
 
 """
 This file is part of xno-gate.
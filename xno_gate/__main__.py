@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+from datetime import datetime, timedelta
 import xno_gate.gate as xno_gate
+from xno_gate.sidecar import serve_config
 
 """
 This file is part of xno-gate.
@@ -38,6 +40,8 @@ def cli_args():
     parser.add_argument("proxy", type=str, help="API proxy url. See https://docs.nano.org/integration-guides/#public-apis")
     parser.add_argument("account", type=str, help="Nano account (public address) to check.")
     parser.add_argument("amount", type=int, help="How many nano?", )
+    parser.add_argument("--hours", type=float, default=None,
+                        help="Page back through this many hours of history. Default only checks the newest 25 blocks.")
 
     return parser.parse_args()
 
@@ -51,10 +55,22 @@ def been_paid():
 
     amount = gate.to_raw(args.amount)
 
-    result = gate.been_paid(args.account, amount)
+    since = None if args.hours is None else datetime.now() - timedelta(hours=args.hours)
+    result = gate.been_paid(args.account, amount, since)
 
     if result is None:
         print("Never")
         return
 
     print(result.isoformat())
+
+
+def gate_daemon():
+    "Serve gate verdicts to local workers over a Unix socket, keeping all RPC traffic in this one process."
+
+    parser = argparse.ArgumentParser(description="Serve gate verdicts over a Unix socket. See xno_gate.sidecar for the protocol.")
+    parser.add_argument("config", type=str, help="json file naming the RPC proxy and each gate's keys.")
+    parser.add_argument("socket", type=str, help="Path of the Unix socket to listen on.")
+    args = parser.parse_args()
+
+    serve_config(args.config, args.socket)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import abc
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import functools
+from itertools import islice
+
+from xno_gate.gate import Gate, _unlocking_tier
+
+"Asyncio counterparts of the gate and its interfaces, so payment checks don't block the event loop."
+
+
+class AsyncXnoInterface(abc.ABC):
+    """Awaitable version of XnoInterface. See XnoInterface for the meaning of each method."""
+
+    received_ordered = False
+
+    @abc.abstractmethod
+    async def received(self, account):
+        pass
+
+    @abc.abstractmethod
+    async def receivable(self, account, threshold=10 ** 30):
+        pass
+
+    async def iter_received(self, account):
+        """Produce Received payments to the given account lazily, newest first, as an async iterator. Override this when the backend can page through history."""
+        received = await self.received(account)
+
+        if not self.received_ordered:
+            received = sorted(received, key=lambda x: x.time, reverse=True)
+
+        for payment in received:
+            yield payment
+
+    @abc.abstractmethod
+    async def save_lock_state(self, unlocked, until=None):
+        pass
+
+    @abc.abstractmethod
+    async def load_lock_state(self):
+        pass
+
+
+class AsyncRPCInterface(AsyncXnoInterface):
+
+    # Payments pulled per trip to the executor from an interface that can't page by batch.
+    _CHUNK = 64
+
+    def __init__(self, xno_interface, executor=None, max_workers=64):
+        """Run a blocking XnoInterface, such as DefaultRPCInterface, off the event loop.
+
+        Every blocking call holds an executor thread, so at most that many lookups are in flight at once, however many keys AsyncGate checks concurrently. The loop's default executor has only min(32, cpu count + 4) threads, so this interface keeps its own.
+
+        Arguments:
+            xno_interface: the XnoInterface to wrap.
+            executor: optional concurrent.futures.Executor for the blocking calls. Default is a thread pool of {max_workers}, made on first use.
+            max_workers: int, threads in the default executor. Size it to the number of accounts checked at once. With DefaultRPCInterface, size its RPCSession pool_size to match, so every thread keeps a warm connection.
+        """
+        self.xno_interface = xno_interface
+        self.executor = executor
+        self.max_workers = max_workers
+
+    @property
+    def received_ordered(self):
+        return self.xno_interface.received_ordered
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="xno-gate-aio")
+
+        return self.executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), functools.partial(fn, *args))
+
+    async def received(self, account):
+        return await self._run(lambda: list(self.xno_interface.received(account)))
+
+    async def iter_received(self, account):
+
+        # one page per trip, so history is fetched no further back than it is read
+        if self.xno_interface.received_columnar:
+            batches = await self._run(lambda: iter(self.xno_interface.iter_received_batches(account)))
+
+            while True:
+                batch = await self._run(next, batches, None)
+
+                if batch is None:
+                    return
+
+                for payment in batch:
+                    yield payment
+
+        # starting a stream may already do the lookup
+        stream = await self._run(lambda: iter(self.xno_interface.iter_received(account)))
+
+        while True:
+            chunk = await self._run(lambda: list(islice(stream, self._CHUNK)))
+
+            for payment in chunk:
+                yield payment
+
+            if len(chunk) < self._CHUNK:
+                return
+
+    async def receivable(self, account, threshold=10 ** 30):
+        return await self._run(self.xno_interface.receivable, account, threshold)
+
+    async def save_lock_state(self, unlocked, until=None):
+        return await self._run(self.xno_interface.save_lock_state, unlocked, until)
+
+    async def load_lock_state(self):
+        return await self._run(self.xno_interface.load_lock_state)
+
+
+class AsyncGate():
+
+    def __init__(self, xno_interface):
+        """Awaitable version of Gate. All keys are checked concurrently when the gate is asked whether it is unlocked.
+
+        Arguments:
+            xno_interface: an AsyncXnoInterface
+        """
+
+        self.xno_interface = xno_interface
+        self.keys = dict()
+
+    async def _received(self, account):
+        """Produce the Received transactions for a given account, in reverse date order."""
+        received = await self.xno_interface.received(account)
+
+        if self.xno_interface.received_ordered:
+            return received
+
+        return sorted(received, key=lambda x: x.time, reverse=True)
+
+    async def _received_until(self, account, cutoff):
+        """Produce the Received transactions for a given account newer than {cutoff}, in reverse date order, paging back only that far."""
+        received = list()
+
+        async for payment in self.xno_interface.iter_received(account):
+            if payment.time <= cutoff:
+                break
+
+            received.append(payment)
+
+        return received
+
+    async def been_paid(self, account, amount, since=None):
+        """When was the last time {account} got paid at least {amount}? See Gate.been_paid: without {since}, only one received() lookup is searched."""
+
+        if since is None:
+            for payment in await self._received(account):
+                if payment.amount >= amount:
+                    return payment.time
+
+            return
+
+        async for payment in self.xno_interface.iter_received(account):
+            if payment.time < since:
+                return
+
+            if payment.amount >= amount:
+                return payment.time
+
+    async def total_received_since(self, account, when):
+        """How many raw have been received by {account} since {when}? See Gate.total_received_since."""
+
+        total = 0
+
+        async for payment in self.xno_interface.iter_received(account):
+            if payment.time < when:
+                break
+
+            total += payment.amount
+
+        return total
+
+    async def has_receivable(self, account, amount):
+        """Does the {account} have a receivable of at least {amount}? See Gate.has_receivable."""
+
+        receivable = await self.xno_interface.receivable(account, amount)
+
+        if receivable:
+            return len(receivable) > 0
+        else:
+            return False
+
+    async def total_receivable(self, account):
+        """What's the total receivable to {account}? See Gate.total_receivable."""
+        total = 0
+
+        for payment in await self.xno_interface.receivable(account, 1) or []:
+            total += payment.amount
+
+        return total
+
+    add_key = Gate.add_key
+
+    async def unlocked(self):
+        """Is the gate unlocked?
+
+        Every account is checked at once, all of its tiers against one fetch. Like Gate.unlocked, the longest timeout key that unlocks the gate wins, so this returns as soon as a key unlocks and every account with a longer key has answered; the remaining checks are cancelled.
+
+            Output: a future datetime (when it will be locked again) if unlocked, or None if locked.
+        """
+        now = datetime.now()
+        lock_state = await self.xno_interface.load_lock_state()
+
+        # Defer to cache
+        if lock_state and lock_state.until > now:
+
+            if lock_state.unlocked:
+                return lock_state.until
+
+            return
+
+        # Check accounts, concurrently
+        accounts = self._sorted_accounts()
+        checks = [asyncio.ensure_future(self._check_account(tiers, now)) for tiers in accounts]
+        until, unlocking = None, None
+
+        try:
+            for tiers, check in zip(accounts, checks):
+                if unlocking is not None and tiers[0].timeout <= unlocking.timeout:
+                    break
+
+                found, key = await check
+
+                if found and (unlocking is None or key.timeout > unlocking.timeout):
+                    until, unlocking = found, key
+        finally:
+            for check in checks:
+                check.cancel()
+
+        if until:
+            await self.xno_interface.save_lock_state(True, until)
+            return until
+
+        await self.xno_interface.save_lock_state(False)
+        return
+
+    _sorted_accounts = Gate._sorted_accounts
+
+    async def _check_account(self, tiers, now):
+        """Which of one account's keys unlocks the gate as of {now}? See Gate._check_account."""
+        account = tiers[0].account
+        amounts = [key.amount for key in tiers if key.receivable]
+
+        # tiers are longest timeout first, so no payment older than the first one's cutoff can unlock
+        history = self._received_until(account, now - timedelta(seconds=tiers[0].timeout))
+
+        if amounts:
+            received, pending = await asyncio.gather(history, self.xno_interface.receivable(account, min(amounts)))
+        else:
+            received, pending = await history, None
+
+        return _unlocking_tier(tiers, received, pending or [], now)
+
+    to_raw = staticmethod(Gate.to_raw)
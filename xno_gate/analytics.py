@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import math
+
+"Aggregate queries over the received history of many accounts at once, vectorized with NumPy when it is installed."
+
+_WORD = 0xFFFFFFFF
+
+# Set by _numpy() on first use, so importing xno_gate doesn't load NumPy.
+numpy = None
+
+
+def _numpy():
+    """Import NumPy if it is installed. Output: the numpy module, or None."""
+    global numpy
+
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            return
+
+    return numpy
+
+
+class HistoryFrame:
+
+    def __init__(self, batches, use_numpy=None):
+        """Hold the received history of many accounts as columns, for windowed sums, first payment lookups and time bucketed totals across every account in one pass.
+
+        With NumPy, amounts stay split into high and low 64 bit words and sums are done in 32 bit limbs, so totals are exact raw. Without it, the same queries run in pure Python over the same columns.
+
+        Arguments:
+            batches: dict of account: iterable of payment.ReceivedBatch
+            use_numpy: optional boolean. Default is to use NumPy when it is installed.
+        """
+        self.batches = {account: list(account_batches) for account, account_batches in batches.items()}
+        self.accounts = list(self.batches)
+        installed = _numpy() is not None
+        self.use_numpy = installed if use_numpy is None else use_numpy
+        self._columns = None
+
+        if self.use_numpy and not installed:
+            raise ImportError("HistoryFrame needs the numpy package for use_numpy=True: pip install xno_gate[numpy]")
+
+    @classmethod
+    def from_interface(cls, xno_interface, accounts, use_numpy=None):
+        """Fetch the received history of {accounts} through an XnoInterface."""
+        return cls({account: xno_interface.iter_received_batches(account) for account in accounts}, use_numpy)
+
+    def _numpy_columns(self):
+        """Concatenate every batch into (account codes, times, high words, low words) arrays."""
+        if self._columns is None:
+            codes, times, high, low = [], [], [], []
+
+            for code, account in enumerate(self.accounts):
+                for batch in self.batches[account]:
+                    if not len(batch):
+                        continue
+
+                    codes.append(numpy.full(len(batch), code, dtype=numpy.int64))
+                    times.append(numpy.frombuffer(batch.times, dtype=numpy.int64))
+                    high.append(numpy.frombuffer(batch.high, dtype=numpy.uint64))
+                    low.append(numpy.frombuffer(batch.low, dtype=numpy.uint64))
+
+            def join(parts, dtype):
+                return numpy.concatenate(parts) if parts else numpy.zeros(0, dtype=dtype)
+
+            self._columns = (join(codes, numpy.int64), join(times, numpy.int64), join(high, numpy.uint64), join(low, numpy.uint64))
+
+        return self._columns
+
+    @staticmethod
+    def _numpy_sums(groups, high, low, size):
+        """Exact raw totals per group, summing 32 bit limbs in 64 bit accumulators."""
+        limbs = [low & _WORD, low >> numpy.uint64(32), high & _WORD, high >> numpy.uint64(32)]
+        sums = list()
+
+        for limb in limbs:
+            acc = numpy.zeros(size, dtype=numpy.uint64)
+            numpy.add.at(acc, groups, limb)
+            sums.append(acc)
+
+        return [int(a) + (int(b) << 32) + (int(c) << 64) + (int(d) << 96) for a, b, c, d in zip(*sums)]
+
+    @staticmethod
+    def _timestamp(when, default):
+        """Epoch seconds for a query bound, rounded up: the times column holds whole seconds, so >= and < stay exact against a fractional bound."""
+        return default if when is None else math.ceil(when.timestamp())
+
+    def window_totals(self, start, end=None):
+        """How many raw did each account receive from {start} until {end}?
+
+        Arguments:
+            start: datetime, inclusive
+            end: optional datetime, exclusive. Default is no end.
+
+        Output: dict of account: int
+        """
+        start, end = self._timestamp(start, None), self._timestamp(end, 2 ** 62)
+
+        if not self.use_numpy:
+            return {account: sum(batch.amount(n) for batch in self.batches[account] for n, t in enumerate(batch.times) if start <= t < end)
+                    for account in self.accounts}
+
+        codes, times, high, low = self._numpy_columns()
+        mask = (times >= start) & (times < end)
+        totals = self._numpy_sums(codes[mask], high[mask], low[mask], len(self.accounts))
+        return dict(zip(self.accounts, totals))
+
+    def first_at_least(self, amount, since=None):
+        """When did each account last receive a single payment of at least {amount}, on or after {since}?
+
+        Output: dict of account: datetime or None
+        """
+        since = self._timestamp(since, -2 ** 62)
+
+        if not self.use_numpy:
+            found = dict()
+
+            for account in self.accounts:
+                times = [batch.times[n] for batch in self.batches[account] for n in range(len(batch)) if batch.amount(n) >= amount and batch.times[n] >= since]
+                found[account] = datetime.fromtimestamp(max(times)) if times else None
+
+            return found
+
+        codes, times, high, low = self._numpy_columns()
+        threshold_high, threshold_low = numpy.uint64(amount >> 64), numpy.uint64(amount & 0xFFFFFFFFFFFFFFFF)
+        mask = ((high > threshold_high) | ((high == threshold_high) & (low >= threshold_low))) & (times >= since)
+
+        newest = numpy.full(len(self.accounts), numpy.iinfo(numpy.int64).min, dtype=numpy.int64)
+        numpy.maximum.at(newest, codes[mask], times[mask])
+
+        return {account: None if mask_time == numpy.iinfo(numpy.int64).min else datetime.fromtimestamp(int(mask_time))
+                for account, mask_time in zip(self.accounts, newest)}
+
+    def bucket_totals(self, start, end, bucket):
+        """How many raw did each account receive in each {bucket} long interval from {start} until {end}?
+
+        Arguments:
+            start: datetime, start of the first bucket
+            end: datetime, exclusive end of the last bucket
+            bucket: timedelta, bucket width
+
+        Output: dict of account: Array of int, one total per bucket, oldest first
+        """
+        width = int(bucket.total_seconds())
+        buckets = max(0, math.ceil((end.timestamp() - start.timestamp()) / width))
+        start, end = self._timestamp(start, None), self._timestamp(end, None)
+
+        if not self.use_numpy:
+            totals = {account: [0] * buckets for account in self.accounts}
+
+            for account in self.accounts:
+                for batch in self.batches[account]:
+                    for n, t in enumerate(batch.times):
+                        if start <= t < end:
+                            totals[account][(t - start) // width] += batch.amount(n)
+
+            return totals
+
+        codes, times, high, low = self._numpy_columns()
+        mask = (times >= start) & (times < end)
+        groups = codes[mask] * buckets + (times[mask] - start) // width
+        sums = self._numpy_sums(groups, high[mask], low[mask], len(self.accounts) * buckets)
+
+        return {account: sums[code * buckets:(code + 1) * buckets] for code, account in enumerate(self.accounts)}
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import threading
+import time
+
+from xno_gate.gate import XnoInterface
+from xno_gate.ratelimit import SingleFlight
+
+"In-process caching of RPC lookups, for applications that ask about the same accounts over and over."
+
+
+class TTLCache:
+
+    def __init__(self, ttl, maxsize):
+        """A thread safe mapping whose entries expire after {ttl} seconds, evicting the least recently used entry past {maxsize} entries."""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Produce (True, value) for a live entry, or (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return False, None
+
+            expires, value = entry
+
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, match=None):
+        """Drop every entry, or only those whose key satisfies {match}."""
+        with self._lock:
+            if match is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _Replay:
+
+    def __init__(self, iterator):
+        """Share one lazy iterator between many readers. Items are kept as they are pulled, so later readers replay them and only the first to go further pulls more."""
+        self._iterator = iterator
+        self._items = list()
+        self._error = None
+        self._done = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        n = 0
+
+        while True:
+            if n < len(self._items):
+                yield self._items[n]
+                n += 1
+                continue
+
+            with self._lock:
+                if n < len(self._items):
+                    continue
+
+                if self._error is not None:
+                    raise self._error
+
+                if self._done:
+                    return
+
+                try:
+                    self._items.append(next(self._iterator))
+                except StopIteration:
+                    self._done = True
+                    return
+                except Exception as e:
+                    self._error = e
+                    raise
+
+
+class CachingInterface(XnoInterface):
+
+    def __init__(self, xno_interface, ttl=30, maxsize=1024):
+        """Wrap any XnoInterface, memoizing its payment lookups. Concurrent misses for the same lookup share a single call to the wrapped interface.
+
+        Streamed history is cached as far as it has been read: a later query replays it, and only pages further back if it needs to. The wrapped interface's capability flags pass through, so a Gate queries it the same way it would unwrapped.
+
+        Arguments:
+            xno_interface: the XnoInterface to wrap. Lock state calls pass straight through.
+            ttl: float, seconds a lookup result stays fresh.
+            maxsize: int, the most lookup results kept; the least recently used is evicted first.
+        """
+        self.xno_interface = xno_interface
+        self._cache = TTLCache(ttl, maxsize)
+        self._flight = SingleFlight()
+
+    @property
+    def received_ordered(self):
+        return self.xno_interface.received_ordered
+
+    @property
+    def received_columnar(self):
+        return self.xno_interface.received_columnar
+
+    @property
+    def received_indexed(self):
+        return self.xno_interface.received_indexed
+
+    @property
+    def receivable_aggregates(self):
+        return self.xno_interface.receivable_aggregates
+
+    @property
+    def receivable_batched(self):
+        return self.xno_interface.receivable_batched
+
+    def _lookup(self, key, fn):
+        """Answer from the cache, or run {fn} once for all concurrent callers and cache its result."""
+        hit, value = self._cache.get(key)
+
+        if hit:
+            return value
+
+        def fetch():
+            value = fn()
+            self._cache.set(key, value)
+            return value
+
+        return self._flight.do(key, fetch)
+
+    def received(self, account):
+        return self._lookup(("received", account), lambda: list(self.xno_interface.received(account)))
+
+    def _stream(self, key, fn):
+        """Replay the cached stream for {key}, starting it with {fn} on a miss. A stream that fails is dropped, so the next query starts afresh."""
+        replay = self._lookup(key, lambda: _Replay(iter(fn())))
+
+        try:
+            yield from replay
+        except Exception:
+            self._cache.discard(lambda cached: cached == key)
+            raise
+
+    def iter_received(self, account):
+        return self._stream(("iter_received", account), lambda: self.xno_interface.iter_received(account))
+
+    def iter_received_batches(self, account):
+        return self._stream(("iter_received_batches", account), lambda: self.xno_interface.iter_received_batches(account))
+
+    def last_paid(self, account, amount, since=None):
+        return self.xno_interface.last_paid(account, amount, since)
+
+    def total_received(self, account, start, end=None):
+        return self.xno_interface.total_received(account, start, end)
+
+    def receivable(self, account, threshold=10 ** 30):
+        return self._lookup(("receivable", account, threshold), lambda: self.xno_interface.receivable(account, threshold))
+
+    def _lookup_many(self, name, accounts, fetch, *arguments):
+        """Answer each account from the cache, fetching every miss with one call to {fetch}."""
+        found = dict()
+        misses = list()
+
+        for account in accounts:
+            hit, value = self._cache.get((name, account) + arguments)
+
+            if hit:
+                found[account] = value
+            else:
+                misses.append(account)
+
+        if misses:
+            for account, value in fetch(misses, *arguments).items():
+                self._cache.set((name, account) + arguments, value)
+                found[account] = value
+
+        return found
+
+    def receivable_many(self, accounts, threshold=10 ** 30):
+        receivable = self._lookup_many("receivable", accounts, self.xno_interface.receivable_many, threshold)
+        return {account: value or [] for account, value in receivable.items()}
+
+    def receivable_exists(self, account, threshold=10 ** 30):
+        return self._lookup(("receivable_exists", account, threshold), lambda: self.xno_interface.receivable_exists(account, threshold))
+
+    def receivable_total(self, account):
+        return self._lookup(("receivable_total", account), lambda: self.xno_interface.receivable_total(account))
+
+    def receivable_total_many(self, accounts):
+        return self._lookup_many("receivable_total", accounts, self.xno_interface.receivable_total_many)
+
+    def invalidate(self, account=None):
+        """Forget cached lookups for {account}, or for every account."""
+        if account is None:
+            self._cache.discard()
+        else:
+            self._cache.discard(lambda key: key[1] == account)
+
+    def save_lock_state(self, unlocked, until=None):
+        return self.xno_interface.save_lock_state(unlocked, until)
+
+    def load_lock_state(self):
+        return self.xno_interface.load_lock_state()
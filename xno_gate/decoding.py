@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+from xno_gate.entities import HistoryBlock, Receivable
+
+"Decode RPC response bodies once, with the fastest json parser installed, into typed history and receivable blocks."
+
+
+class JSONDecoder:
+
+    name = "json"
+
+    def loads(self, body):
+        """Parse an RPC response body.
+
+        Arguments:
+            body: bytes, the raw response body
+
+        Output: decoded json. Raises ValueError if the body is not json.
+        """
+        return json.loads(body)
+
+    @staticmethod
+    def history_records(jsr):
+        """Produce the records of a decoded account_history response as they were decoded, for callers that read them straight into columns.
+
+        Output: Array of decoded records, newest first. Empty if the account has no history.
+        """
+        history = jsr["history"]
+
+        if type(history) is not list:
+            return []
+
+        return history
+
+    def history(self, jsr):
+        """Convert the records of a decoded account_history response.
+
+        Output: Array of HistoryBlock, newest first. Empty if the account has no history.
+        """
+        return [HistoryBlock.from_json(record) for record in self.history_records(jsr)]
+
+    @staticmethod
+    def receivable(blocks):
+        """Convert a decoded {hash: amount} mapping of receivable blocks.
+
+        Output: Array of Receivable, or None if {blocks} is not a mapping (the RPC answers "" when there are none).
+        """
+        if type(blocks) is not dict:
+            return
+
+        return [Receivable(int(amount)) for amount in blocks.values()]
+
+
+class OrjsonDecoder(JSONDecoder):
+
+    name = "orjson"
+
+    def __init__(self):
+        """Parse with orjson. Its decode error is a ValueError already."""
+        if orjson is None:
+            raise ImportError("OrjsonDecoder needs the orjson package: pip install xno_gate[fast]")
+
+    def loads(self, body):
+        return orjson.loads(body)
+
+
+class MsgspecDecoder(JSONDecoder):
+
+    name = "msgspec"
+
+    def __init__(self):
+        """Parse with msgspec, reusing one decoder for every body."""
+        if msgspec is None:
+            raise ImportError("MsgspecDecoder needs the msgspec package: pip install msgspec")
+
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, body):
+        try:
+            return self._decoder.decode(body)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+def default_decoder():
+    """Produce the fastest decoder installed: orjson, then msgspec, then the standard library."""
+    if orjson is not None:
+        return OrjsonDecoder()
+
+    if msgspec is not None:
+        return MsgspecDecoder()
+
+    return JSONDecoder()
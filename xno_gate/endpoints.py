@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+import threading
+import time
+
+import requests
+
+from xno_gate.session import RPCSession
+
+"Spread RPC calls over several nodes, preferring the fastest and routing around the ones that fail."
+
+
+class _BadStatus(Exception):
+
+    def __init__(self, response):
+        """An endpoint answered with a status that counts as a failure."""
+        super().__init__(f"status: {response.status_code}")
+        self.response = response
+
+
+class Endpoint:
+
+    def __init__(self, url, window=100, alpha=0.2):
+        """Latency and error counters for one RPC node.
+
+        Arguments:
+            url: str, RPC node url.
+            window: int, how many recent latencies are kept for percentiles.
+            alpha: float, weight of the newest sample in the moving average latency.
+        """
+        self.url = url
+        self.alpha = alpha
+        self.latency = None
+        self.calls = 0
+        self.errors = 0
+        self.failures = 0
+        self.open_until = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def succeeded(self, seconds):
+        with self._lock:
+            self.calls += 1
+            self.failures = 0
+            self.open_until = 0
+            self._recent.append(seconds)
+            self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+
+    def failed(self, threshold, cooldown):
+        """Count a failure, opening the circuit for {cooldown} seconds once {threshold} failures happen in a row."""
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.failures += 1
+
+            if self.failures >= threshold:
+                self.open_until = time.monotonic() + cooldown
+
+    def available(self):
+        """Is the circuit closed, or has its cooldown run out so it may be tried again?"""
+        return self.open_until <= time.monotonic()
+
+    def percentile(self, p):
+        """Produce the {p} (0 to 1) percentile of recent latencies, in seconds, or None without samples."""
+        with self._lock:
+            recent = sorted(self._recent)
+
+        if not recent:
+            return
+
+        return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+    def samples(self):
+        return len(self._recent)
+
+    def stats(self):
+        return \
+            {
+                "latency": self.latency,
+                "p50": self.percentile(0.5),
+                "p95": self.percentile(0.95),
+                "calls": self.calls,
+                "errors": self.errors,
+                "open": not self.available(),
+            }
+
+
+class EndpointPool:
+
+    # Statuses that mean the node, rather than the call, is in trouble.
+    FAILURE_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, urls, session=None, failures=3, cooldown=30, hedge=None, hedge_after=10):
+        """Route each RPC call to the node with the lowest recent latency, failing over to the next one when it errors.
+
+        Arguments:
+            urls: Array of str, RPC node urls.
+            session: optional RPCSession shared by every node. With several nodes the default session doesn't retry, so a failing node is counted and routed around on its first error instead of after the session's retries and backoff.
+            failures: int, consecutive failures that eject a node.
+            cooldown: float, seconds an ejected node is skipped before it is tried again.
+            hedge: optional float percentile, e.g. 0.95. A call still unanswered after that percentile of the fastest node's recent latency is duplicated to the second fastest; the first answer wins.
+            hedge_after: int, latency samples a node needs before its calls are hedged.
+        """
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.session = session or (RPCSession(retries=0) if len(self.endpoints) > 1 else RPCSession())
+        self.failures = failures
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self._executor = None
+        self._lock = threading.Lock()
+
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one url.")
+
+    def ranked(self):
+        """Produce the endpoints to try, fastest first. Untried nodes go first so they get measured. If every circuit is open, every node is tried anyway."""
+        available = [endpoint for endpoint in self.endpoints if endpoint.available()] or list(self.endpoints)
+        return sorted(available, key=lambda endpoint: endpoint.latency or 0)
+
+    def _call(self, endpoint, payload, timeout):
+        start = time.monotonic()
+
+        try:
+            response = self.session.post(endpoint.url, payload, timeout=timeout)
+        except requests.RequestException:
+            endpoint.failed(self.failures, self.cooldown)
+            raise
+
+        if response.status_code in self.FAILURE_STATUSES:
+            endpoint.failed(self.failures, self.cooldown)
+            raise _BadStatus(response)
+
+        endpoint.succeeded(time.monotonic() - start)
+        return response
+
+    def _hedging_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2 * len(self.endpoints))
+
+            return self._executor
+
+    def _hedged(self, first, second, payload, timeout):
+        """Call {first}, and {second} too if {first} is slower than usual. Produce whichever answers first."""
+        executor = self._hedging_executor()
+        calls = [executor.submit(self._call, first, payload, timeout)]
+
+        try:
+            return calls[0].result(timeout=first.percentile(self.hedge))
+        except TimeoutError:
+            pass
+        except (requests.RequestException, _BadStatus):
+            return self._call(second, payload, timeout)
+
+        calls.append(executor.submit(self._call, second, payload, timeout))
+        error = None
+
+        while calls:
+            done, pending = wait(calls, return_when=FIRST_COMPLETED)
+
+            for call in done:
+                try:
+                    return call.result()
+                except (requests.RequestException, _BadStatus) as e:
+                    error = e
+
+            calls = list(pending)
+
+        raise error
+
+    def post(self, payload, timeout=None):
+        """Send an RPC payload to the best node, failing over until one answers.
+
+        Output:
+            requests.Response. If every node fails, the last failing response, or the last exception is raised.
+        """
+        candidates = self.ranked()
+        error = None
+
+        if self.hedge is not None and len(candidates) > 1 and candidates[0].samples() >= self.hedge_after:
+            try:
+                return self._hedged(candidates[0], candidates[1], payload, timeout)
+            except (requests.RequestException, _BadStatus) as e:
+                error = e
+                candidates = candidates[2:]
+
+        for endpoint in candidates:
+            try:
+                return self._call(endpoint, payload, timeout)
+            except (requests.RequestException, _BadStatus) as e:
+                error = e
+
+        if isinstance(error, _BadStatus):
+            return error.response
+
+        raise error
+
+    def stats(self):
+        """Produce per node latency and error counters, by url."""
+        return {endpoint.url: endpoint.stats() for endpoint in self.endpoints}
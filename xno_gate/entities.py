@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from array import array
+from datetime import datetime
+
 
 # Payment Entities
 
 class Received:
 
+    __slots__ = ("amount", "time")
+
     def __init__(self, amount, time):
         """Represent a *received* payment.
 
@@ -23,8 +28,123 @@ class Received:
         yield ("time", self.time.timestamp())
 
 
+class HistoryBlock:
+
+    __slots__ = ("type", "hash", "amount", "local_timestamp")
+
+    def __init__(self, type, hash, amount, local_timestamp):
+        """Represent one account_history record, with its numbers already converted.
+
+        Args:
+            type: str, block subtype, such as 'send' or 'receive'
+            hash: str, block hash
+            amount: int, amount in nano raw
+            local_timestamp: int, epoch seconds the node saw the block
+        """
+
+        self.type = type
+        self.hash = hash
+        self.amount = amount
+        self.local_timestamp = local_timestamp
+
+    @classmethod
+    def from_json(cls, record):
+        """Convert a decoded account_history record."""
+        return cls(record["type"], record["hash"], int(record["amount"]), int(record["local_timestamp"]))
+
+    def received(self):
+        """Produce a Received payment for a receive block, or None."""
+        if self.type == "receive":
+            return Received(self.amount, datetime.fromtimestamp(self.local_timestamp))
+
+        return
+
+
+class ReceivedBatch:
+
+    __slots__ = ("high", "low", "times")
+
+    def __init__(self, high=None, low=None, times=None):
+        """Represent many *received* payments as columns, newest first, without an object per payment.
+
+        Amounts are split into high and low 64 bit words, so 128 bit raw amounts stay exact. Times are integer epoch seconds.
+
+        Args:
+            high: array('Q'), the upper 64 bits of each amount
+            low: array('Q'), the lower 64 bits of each amount
+            times: array('q'), each block 'local timestamp'
+        """
+
+        self.high = high if high is not None else array("Q")
+        self.low = low if low is not None else array("Q")
+        self.times = times if times is not None else array("q")
+
+    @classmethod
+    def from_history(cls, history):
+        """Collect the receive blocks from RPC account_history records."""
+        batch = cls()
+
+        for block in history:
+            if block["type"] == "receive":
+                batch.append(int(block["amount"]), int(block["local_timestamp"]))
+
+        return batch
+
+    @classmethod
+    def from_received(cls, received):
+        """Collect Received payments, newest first."""
+        batch = cls()
+
+        for payment in received:
+            batch.append(payment.amount, int(payment.time.timestamp()))
+
+        return batch
+
+    def append(self, amount, timestamp):
+        self.high.append(amount >> 64)
+        self.low.append(amount & 0xFFFFFFFFFFFFFFFF)
+        self.times.append(timestamp)
+
+    def __len__(self):
+        return len(self.times)
+
+    def amount(self, index):
+        return self.high[index] << 64 | self.low[index]
+
+    def time(self, index):
+        return datetime.fromtimestamp(self.times[index])
+
+    def first_at_least(self, amount):
+        """Produce the index of the newest payment of at least {amount}, or None."""
+        high, low = amount >> 64, amount & 0xFFFFFFFFFFFFFFFF
+
+        for index, (h, l) in enumerate(zip(self.high, self.low)):
+            if h > high or (h == high and l >= low):
+                return index
+
+        return
+
+    def older_than(self, timestamp):
+        """Produce the index of the newest payment before epoch second {timestamp}, or len(self) if there is none."""
+        for index, t in enumerate(self.times):
+            if t < timestamp:
+                return index
+
+        return len(self.times)
+
+    def total(self, start=0, stop=None):
+        """Produce the exact raw total of payments [start:stop]."""
+        return (sum(self.high[start:stop]) << 64) + sum(self.low[start:stop])
+
+    def __iter__(self):
+        for h, l, t in zip(self.high, self.low, self.times):
+            yield Received(h << 64 | l, datetime.fromtimestamp(t))
+
+
 class Receivable:
 
+    __slots__ = ("amount",)
+
     def __init__(self, amount):
         """Represent a pending payment.
 
@@ -39,6 +159,8 @@ class Receivable:
 
 class Key:
 
+    __slots__ = ("account", "amount", "timeout", "receivable")
+
     def __init__(self, account, amount, timeout, receivable):
         """If this account has been paid, how long should the gate be unlocked?
 
@@ -57,6 +179,8 @@ class Key:
 
 class LockState:
 
+    __slots__ = ("unlocked", "until")
+
     def __init__(self, unlocked, until):
         """For cache purposes, has the gate been unlocked and when does this status expire?
 
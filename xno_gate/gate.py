@@ -3,10 +3,15 @@
 
 import abc
 from datetime import datetime, timedelta
-import requests
+from itertools import islice, takewhile
 import json
+import time
 
-from xno_gate.entities import Key, LockState, Received, Receivable
+from xno_gate.decoding import default_decoder
+from xno_gate.endpoints import EndpointPool
+from xno_gate.entities import HistoryBlock, Key, LockState, Received, ReceivedBatch
+from xno_gate.lockstate import DEFAULT_GATE, JSONLockStore, MemoryLockStore
+from xno_gate.ratelimit import SingleFlight
 
 "Provide means for the admin to determine whether appropriate payments have been made or are pending."
 
@@ -14,6 +19,21 @@ from xno_gate.entities import Key, LockState, Received, Receivable
 class XnoInterface(abc.ABC):
     """Provide an external interface to the Nano block lattice, or simulate for testing, etc. as needed."""
 
+    # Set True when received() already produces payments newest first, so they can be streamed without sorting.
+    received_ordered = False
+
+    # Set True when iter_received_batches() is cheaper than iter_received(), so Gate queries run on columns.
+    received_columnar = False
+
+    # Set True when the backend answers last_paid() and total_received() from an index, so Gate asks it directly.
+    received_indexed = False
+
+    # Set True when receivable_exists() and receivable_total() are cheaper than listing every receivable block, so Gate asks them directly.
+    receivable_aggregates = False
+
+    # Set True when receivable_many() is one batched lookup, so Gate fetches every key's receivables up front instead of key by key.
+    receivable_batched = False
+
     @abc.abstractmethod
     def received(self, account):
         """Produce Received payments to the given account. Note that it is up to this interface to handle the RPC transaction lookback count.
@@ -39,6 +59,117 @@ class XnoInterface(abc.ABC):
         """
         pass
 
+    def iter_received(self, account):
+        """Produce Received payments to the given account lazily, newest first. Override this when the backend can page through history, so callers that stop early don't pay for blocks they never look at.
+
+        Arguments:
+            account: str, the nano public address to check.
+
+        Output:
+            iterator of payment.Received
+        """
+        if self.received_ordered:
+            return iter(self.received(account))
+
+        return iter(sorted(self.received(account), key=lambda x: x.time, reverse=True))
+
+    def iter_received_batches(self, account):
+        """Produce Received payments to the given account as ReceivedBatch columns, newest first. Override this, and set received_columnar, when the backend can build batches without an object per payment.
+
+        Arguments:
+            account: str, the nano public address to check.
+
+        Output:
+            iterator of payment.ReceivedBatch
+        """
+        yield ReceivedBatch.from_received(self.iter_received(account))
+
+    def receivable_many(self, accounts, threshold=10 ** 30):
+        """Produce Receivable payments above a given threshold for several accounts at once. Override this, and set receivable_batched, when the backend can batch the lookup.
+
+        Arguments:
+            accounts: iterable of str, the nano public addresses to check.
+            threshold: the minimum amount of raw we care about. Default is 10 ** 30 raw, aka 1 nano.
+
+        Output:
+            dict of account: Array of payment.Receivable
+        """
+        return {account: self.receivable(account, threshold) or [] for account in accounts}
+
+    def receivable_exists(self, account, threshold=10 ** 30):
+        """Is there at least one receivable payment above a given threshold for the given account? Override this, and set receivable_aggregates, when the backend can stop at the first block.
+
+        Arguments:
+            account: str, the nano public address to check.
+            threshold: the minimum amount of raw we care about.
+
+        Output:
+            boolean
+        """
+        return bool(self.receivable(account, threshold))
+
+    def receivable_total(self, account):
+        """Produce the raw total of every receivable payment for the given account. Override this, and set receivable_aggregates, when the backend can sum without listing blocks.
+
+        Arguments:
+            account: str, the nano public address to check.
+
+        Output:
+            int
+        """
+        return sum(payment.amount for payment in self.receivable(account, 1) or [])
+
+    def receivable_total_many(self, accounts):
+        """Produce the raw total receivable for several accounts at once. See receivable_total.
+
+        Arguments:
+            accounts: iterable of str, the nano public addresses to check.
+
+        Output:
+            dict of account: int
+        """
+        return {account: sum(payment.amount for payment in receivable) for account, receivable in self.receivable_many(accounts, 1).items()}
+
+    def last_paid(self, account, amount, since=None):
+        """Produce the time of the newest payment of at least {amount} to the given account, on or after {since}, or None. Override this, and set received_indexed, when the backend can look it up without scanning history.
+
+        Arguments:
+            account: str, the nano public address to check.
+            amount: int, smallest relevant amount in raw.
+            since: optional datetime, the oldest payment time that counts.
+
+        Output:
+            datetime or None
+        """
+        for payment in self.iter_received(account):
+            if since is not None and payment.time < since:
+                return
+
+            if payment.amount >= amount:
+                return payment.time
+
+    def total_received(self, account, start, end=None):
+        """Produce the raw received by the given account from {start} until {end}. Override this, and set received_indexed, when the backend can sum without scanning history.
+
+        Arguments:
+            account: str, the nano public address to check.
+            start: datetime, inclusive.
+            end: optional datetime, exclusive. Default is no end.
+
+        Output:
+            int
+        """
+        total = 0
+
+        for payment in self.iter_received(account):
+            if payment.time < start:
+                break
+
+            if end is None or payment.time < end:
+                total += payment.amount
+
+        return total
+
     @abc.abstractmethod
     def save_lock_state(self, unlocked, until=None):
         """The gate is unlocked. Save a future datetime for when it might close again, so we don't need to query the RPC servers when we already know that the gate is unlocked.
@@ -57,20 +188,93 @@ class XnoInterface(abc.ABC):
 
 class DefaultRPCInterface(XnoInterface):
 
-    def __init__(self, proxy, cache_file, lookback=25, rate_limit=60):
+    # account_history is newest first, and so is the history store.
+    received_ordered = True
+    received_columnar = True
+
+    # receivable with count 1 and account_balance answer without listing every block.
+    receivable_aggregates = True
+
+    # accounts_receivable answers for many accounts at once.
+    receivable_batched = True
+
+    def __init__(self, proxy, cache_file, lookback=25, rate_limit=60, session=None, timeout=None, history_store=None, history_depth=None,
+                 lock_store=None, lock_name=DEFAULT_GATE, rate_limiter=None, coalesce=True, instrumentation=None,
+                 decoder=None):
         """Provide an interface to the nano Node RPC protocol.
 
         Arguments:
-            proxy: str, url for an RPC node.
-            cache_file: pathlib.Path to a json file that will be used to cache unlocked/locked lookup results.
+            proxy: str, url for an RPC node. Or an Array of urls, or an EndpointPool, to spread calls over several nodes with failover.
+            cache_file: pathlib.Path to a json file that will be used to cache unlocked/locked lookup results. Ignored when a lock_store is given.
             lookback: maximum number of transaction records to review for the account_history, per RPC spec.
             rate_limit: int, default number of seconds to apply on cached unlocked/locked lookup results.
+            session: optional RPCSession. Pass the same session to several interfaces to share warm connections. Ignored when proxy is an EndpointPool, which brings its own. Default, per EndpointPool, doesn't retry when there are several nodes to fail over to.
+            timeout: optional per-call timeout in seconds, overriding the session default.
+            history_store: optional HistoryStore. When given, received() only fetches blocks newer than the stored frontier, paging back as far as needed, and answers from the store.
+            history_depth: optional int, the most account_history records iter_received will page through. None pages through the whole history.
+            lock_store: optional LockStore for unlocked/locked lookup results, replacing the json cache_file.
+            lock_name: str, the name this interface's verdict is kept under in the lock store.
+            rate_limiter: optional TokenBucket that every RPC call must take a token from. Share one between interfaces to budget them together.
+            coalesce: boolean, should identical RPC calls made at the same time share one request?
+            instrumentation: optional Instrumentation, told about every RPC round trip and response decode.
+            decoder: optional JSONDecoder for response bodies. Default is the fastest one installed.
         """
         self.proxy = proxy
         self.lookback = lookback
-        self._cache_file = cache_file
+
+        if isinstance(proxy, EndpointPool):
+            self.endpoints = proxy
+        else:
+            self.endpoints = EndpointPool([proxy] if isinstance(proxy, str) else proxy, session)
+
+        self.session = self.endpoints.session
+        self.timeout = timeout
+        self.history_store = history_store
+        self.history_depth = history_depth
+        self.lock_name = lock_name
         self._rate_limit = rate_limit
 
+        if lock_store is None:
+            lock_store = JSONLockStore(cache_file) if cache_file is not None else MemoryLockStore()
+
+        self.lock_store = lock_store
+        self.rate_limiter = rate_limiter
+        self.instrumentation = instrumentation
+        self._flight = SingleFlight() if coalesce else None
+        self.decoder = decoder or default_decoder()
+
+    def _post(self, rpc_call):
+        """Send an RPC call, sharing the response with any identical call already in flight."""
+        if self._flight is None:
+            return self._send(rpc_call)
+
+        return self._flight.do(json.dumps(rpc_call, sort_keys=True), lambda: self._send(rpc_call))
+
+    def _rpc(self, rpc_call):
+        """Send an RPC call and decode its json response, parsing the body exactly once.
+
+        Output: (requests.Response, decoded json)
+        """
+        if self.instrumentation is None:
+            result = self._post(rpc_call)
+            return result, self.decoder.loads(result.content)
+
+        start = time.perf_counter()
+        result = self._post(rpc_call)
+        sent = time.perf_counter()
+        jsr = self.decoder.loads(result.content)
+
+        self.instrumentation.rpc(rpc_call["action"], sent - start, len(result.content))
+        self.instrumentation.decode(rpc_call["action"], time.perf_counter() - sent)
+        return result, jsr
+
+    def _send(self, rpc_call):
+        """Send an RPC call to the best available node over the pooled session, within the rate limit."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        return self.endpoints.post(rpc_call, timeout=self.timeout)
+
     @staticmethod
     def _history_to_received(history):
         """Convert an RPC acount_history transaction record into a Received object, or None as appropriate.
@@ -82,105 +286,327 @@ class DefaultRPCInterface(XnoInterface):
             payment.Received, or None
         """
 
-        if history["type"] == "receive":
-            return Received(int(history["amount"]), datetime.fromtimestamp(int(history["local_timestamp"])))
+        return HistoryBlock.from_json(history).received()
 
-        return
+    def _history_pages(self, account):
+        """Produce account_history pages of up to {lookback} records, newest first, following the RPC `previous` pointer with `head` until the history runs out.
+
+        Output:
+            generator of decoded account_history responses
+        """
+        head = None
+
+        while True:
+            rpc_call = \
+                {
+                    "action": "account_history",
+                    "account": account,
+                    "count": self.lookback
+                }
+
+            if head is not None:
+                rpc_call["head"] = head
+
+            result, jsr = self._rpc(rpc_call)
+
+            if "history" not in jsr:
+                raise ValueError(f"RPC call unable to acquire history. status: {result.status_code}")
+
+            yield jsr
+
+            head = jsr.get("previous")
+
+            if not self.decoder.history_records(jsr) or not head:
+                return
+
+    def _history_blocks(self, account):
+        """Produce account_history records as HistoryBlock, newest first, fetching further pages only as they are consumed."""
+        for jsr in self._history_pages(account):
+            yield from self.decoder.history(jsr)
+
+    def sync_history(self, account, store=None):
+        """Fetch the blocks newer than the stored frontier for {account} into a history store.
+
+        Arguments:
+            account: str, nano public address
+            store: optional HistoryStore, or anything with its frontier and extend methods, such as a PaymentIndex. Default is this interface's history_store.
+        """
+        store = self.history_store if store is None else store
+        known = store.frontier(account)
+        previous = known[0] if known else None
+
+        fresh = list(takewhile(lambda block: block.hash != previous, self._history_blocks(account)))
+
+        if not fresh:
+            return
+
+        received = list(filter(None, [block.received() for block in fresh]))
+        store.extend(account, received, fresh[0].hash, fresh[0].local_timestamp, previous)
 
     def received(self, account):
+
+        if self.history_store is not None:
+            self.sync_history(account)
+            return self.history_store.received(account)
+
+        history = self.decoder.history(next(self._history_pages(account)))
+        return filter(None, [block.received() for block in history])
+
+    def iter_received(self, account):
+
+        if self.history_store is not None:
+            self.sync_history(account)
+            yield from self.history_store.received(account)
+            return
+
+        for block in islice(self._history_blocks(account), self.history_depth):
+            payment = block.received()
+
+            if payment:
+                yield payment
+
+    def iter_received_batches(self, account):
+
+        if self.history_store is not None:
+            self.sync_history(account)
+            yield self.history_store.received_batch(account)
+            return
+
+        remaining = self.history_depth
+
+        # records go straight into columns, without a HistoryBlock each
+        for jsr in self._history_pages(account):
+            history = self.decoder.history_records(jsr)
+
+            if remaining is not None:
+                history = history[:remaining]
+                remaining -= len(history)
+
+            yield ReceivedBatch.from_history(history)
+
+            if remaining == 0:
+                return
+
+    def receivable(self, account, threshold=10 ** 30):
+
+        threshold_string = "{:d}".format(int(threshold))
         rpc_call = \
             {
-                "action": "account_history",
+                "action": "receivable",
                 "account": account,
-                "count": self.lookback
+                "threshold": threshold_string,
             }
 
-        result = requests.post(self.proxy, json=rpc_call)
-        jsr = result.json()
+        result, jsr = self._rpc(rpc_call)
 
-        if "history" not in jsr:
-            raise ValueError(f"RPC call unable to acquire history. status: {result.status_code}")
+        if "blocks" not in jsr:
+            raise ValueError(f"RPC call unable to acquire receivable blocks. status: {result.status_code}, msg: {jsr}")
 
-        return filter(None, [self._history_to_received(h) for h in jsr["history"]])
+        return self.decoder.receivable(jsr["blocks"])
 
-    def receivable(self, account, threshold=10 ** 30):
+    def receivable_exists(self, account, threshold=10 ** 30):
 
-        threshold_string = "{:d}".format(int(threshold))
         rpc_call = \
             {
                 "action": "receivable",
                 "account": account,
+                "threshold": "{:d}".format(int(threshold)),
+                "count": "1",
+            }
+
+        result, jsr = self._rpc(rpc_call)
+
+        if "blocks" not in jsr:
+            raise ValueError(f"RPC call unable to acquire receivable blocks. status: {result.status_code}, msg: {jsr}")
+
+        return bool(jsr["blocks"])
+
+    @staticmethod
+    def _balance_receivable(balance):
+        """The receivable total from an account_balance answer. Nodes before V24 call it pending."""
+        return int(balance.get("receivable", balance.get("pending", 0)))
+
+    def receivable_total(self, account):
+
+        result, jsr = self._rpc({"action": "account_balance", "account": account})
+
+        if "receivable" not in jsr and "pending" not in jsr:
+            raise ValueError(f"RPC call unable to acquire account balance. status: {result.status_code}, msg: {jsr}")
+
+        return self._balance_receivable(jsr)
+
+    def receivable_total_many(self, accounts):
+
+        accounts = list(accounts)
+
+        if not accounts:
+            return dict()
+
+        result, jsr = self._rpc({"action": "accounts_balances", "accounts": accounts})
+
+        if "balances" not in jsr:
+            raise ValueError(f"RPC call unable to acquire account balances. status: {result.status_code}, msg: {jsr}")
+
+        balances = jsr["balances"] if type(jsr["balances"]) is dict else dict()
+
+        # some nodes list accounts they can't answer for under "errors"; ask for those one at a time
+        return {account: self._balance_receivable(balances[account]) if account in balances else self.receivable_total(account)
+                for account in accounts}
+
+    def receivable_many(self, accounts, threshold=10 ** 30):
+
+        accounts = list(accounts)
+
+        if not accounts:
+            return dict()
+
+        threshold_string = "{:d}".format(int(threshold))
+        rpc_call = \
+            {
+                "action": "accounts_receivable",
+                "accounts": accounts,
                 "threshold": threshold_string,
             }
 
-        result = requests.post(self.proxy, json=rpc_call)
-        jsr = result.json()
+        result, jsr = self._rpc(rpc_call)
 
         if "blocks" not in jsr:
-            raise ValueError(f"RPC call unable to acquire receivable blocks. status: {result.status_code}, msg: {result.json()}")
+            raise ValueError(f"RPC call unable to acquire receivable blocks. status: {result.status_code}, msg: {jsr}")
 
-        if type(jsr["blocks"]) is dict:
-            return [Receivable(int(amount)) for amount in jsr["blocks"].values()]
+        blocks = jsr["blocks"] if type(jsr["blocks"]) is dict else dict()
+        receivable = dict()
 
-        return
+        for account in accounts:
+            receivable[account] = self.decoder.receivable(blocks.get(account)) or []
+
+        return receivable
 
     def save_lock_state(self, unlocked, until=None):
 
         if until is None:
             until = datetime.now() + timedelta(seconds=self._rate_limit)
 
-        data = {"unlocked": unlocked, "until": until.timestamp()}
-
-        with open(self._cache_file, "w") as f:
-            json.dump(data, f)
+        self.lock_store.save(LockState(unlocked, until), self.lock_name)
 
         return
 
     def load_lock_state(self):
+        return self.lock_store.load(self.lock_name)
 
-        if not self._cache_file.exists():
-            return
 
-        with open(self._cache_file, "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                return
+def _unlocking_tier(tiers, payments, receivable, now):
+    """Find the first of one account's keys, in priority order, that unlocks the gate as of {now}, in a single pass over the account's history.
 
-        return LockState(data["unlocked"], datetime.fromtimestamp(data["until"]))
+    Arguments:
+        tiers: Array of Key for one account, longest timeout first
+        payments: iterable of payment.Received, newest first. Only read back as far as the longest timeout needs.
+        receivable: Array of payment.Receivable for the account, down to the smallest receivable key amount, or None
+        now: datetime
+
+    Output: (until or None, the unlocking Key or None)
+    """
+    results = [None] * len(tiers)
+
+    for n, key in enumerate(tiers):
+        if key.receivable and receivable and any(payment.amount >= key.amount for payment in receivable):
+            results[n] = now + timedelta(seconds=key.timeout)
+
+    # only tiers ahead of the best one found so far are still worth looking for
+    best = next((n for n, until in enumerate(results) if until), len(tiers))
+    cutoffs = [now - timedelta(seconds=key.timeout) for key in tiers]
+
+    if best > 0:
+        for payment in payments:
+            if payment.time <= cutoffs[0]:
+                break
+
+            for n in range(best):
+                if payment.amount >= tiers[n].amount and payment.time > cutoffs[n]:
+                    results[n] = payment.time + timedelta(seconds=tiers[n].timeout)
+                    best = n
+                    break
+
+            if best == 0:
+                break
+
+    if best < len(tiers):
+        return results[best], tiers[best]
+
+    return None, None
 
 
 class Gate():
 
-    def __init__(self, xno_interface):
+    def __init__(self, xno_interface, executor=None, instrumentation=None, rollups=None):
         """Use the interface to verify payments, for the purposes of being unlocked or locked.
 
         Arguments:
             xno_interface: an XnoInterface
+            executor: optional concurrent.futures.Executor. When given, keys are checked in parallel; the interface must be thread safe.
+            instrumentation: optional Instrumentation, told about cache hits and misses, how many keys each verdict took, and which key unlocked the gate.
+            rollups: optional RollupStore. When given, total_received_since and received_histogram are answered from its buckets, fetching only payments newer than it has seen.
         """
 
         self.xno_interface = xno_interface
+        self.executor = executor
+        self.instrumentation = instrumentation
+        self.rollups = rollups
         self.keys = dict()
 
     def _received(self, account):
-        """Produce the Received transactions for a given account, sorted in reverse date order."""
+        """Produce the Received transactions for a given account lazily, in reverse date order."""
+        return self.xno_interface.iter_received(account)
+
+    def _recent(self, account):
+        """Produce the Received transactions from a single received() lookup, in reverse date order. Unlike _received, this never pages further back."""
+        if self.xno_interface.received_ordered:
+            return self.xno_interface.received(account)
+
         return sorted(self.xno_interface.received(account), key=lambda x: x.time, reverse=True)
 
-    def been_paid(self, account, amount):
+    def been_paid(self, account, amount, since=None):
         """When was the last time {account} got paid at least {amount}?
 
         Arguments:
             account: str, the nano public address to check
             amount: int, smallest relevant amount in raw
+            since: optional datetime. History is paged back as far as this, and payments before it are not looked for. Without it, only the payments one received() lookup produces are searched; for DefaultRPCInterface, that is the newest {lookback} records.
 
         Output:
             A datetime or None. As of this writing, the nano interface only produces local timestamps without timezone information, so the datetime should be considered naive regarding time zone.
         """
 
-        for payment in self._received(account):
+        if self.xno_interface.received_indexed:
+            return self.xno_interface.last_paid(account, amount, since)
+
+        if since is None:
+            payments = self._recent(account)
+        elif self.xno_interface.received_columnar:
+            return self._been_paid_columnar(account, amount, since)
+        else:
+            payments = self._received(account)
+
+        for payment in payments:
+            if since is not None and payment.time < since:
+                return
+
             if payment.amount >= amount:
                 return payment.time
 
+    def _been_paid_columnar(self, account, amount, since):
+        """Gate.been_paid over ReceivedBatch columns."""
+        cutoff = since.timestamp()
+
+        for batch in self.xno_interface.iter_received_batches(account):
+            index = batch.first_at_least(amount)
+            stop = batch.older_than(cutoff)
+
+            if index is not None and index < stop:
+                return batch.time(index)
+
+            if stop < len(batch):
+                return
+
     def total_received_since(self, account, when):
         """How many raw have been received by {account} since {when}?
 
@@ -191,14 +617,68 @@ class Gate():
         Output: Int - total raw received.
         """
 
+        if self.rollups is not None:
+            self.rollups.refresh(account, self.xno_interface)
+            return self.rollups.total(account, when)
+
+        if self.xno_interface.received_indexed:
+            return self.xno_interface.total_received(account, when)
+
         total = 0
 
+        if self.xno_interface.received_columnar:
+            cutoff = when.timestamp()
+
+            for batch in self.xno_interface.iter_received_batches(account):
+                stop = batch.older_than(cutoff)
+                total += batch.total(0, stop)
+
+                if stop < len(batch):
+                    break
+
+            return total
+
         for payment in self._received(account):
-            if payment.time >= when:
-                total += payment.amount
+            if payment.time < when:
+                break
+
+            total += payment.amount
 
         return total
 
+    def received_histogram(self, account, start, end, bucket):
+        """How many raw did {account} receive in each {bucket} long interval from {start} until {end}?
+
+        Arguments:
+            account: str, nano public address to check
+            start: datetime, start of the first interval
+            end: datetime, the last interval stops here
+            bucket: timedelta, interval width
+
+        Output: Array of (datetime interval start, int total raw received), oldest first.
+        """
+        if self.rollups is not None:
+            self.rollups.refresh(account, self.xno_interface)
+            return self.rollups.histogram(account, start, end, bucket)
+
+        starts = list()
+        cursor = start
+
+        while cursor < end:
+            starts.append(cursor)
+            cursor += bucket
+
+        totals = [0] * len(starts)
+
+        for payment in self._received(account):
+            if payment.time < start:
+                break
+
+            if payment.time < end:
+                totals[(payment.time - start) // bucket] += payment.amount
+
+        return list(zip(starts, totals))
+
     def has_receivable(self, account, amount):
         """Does the {account} have a receivable of at least {amount}?
 
@@ -209,6 +689,9 @@ class Gate():
         Output: Boolean
         """
 
+        if self.xno_interface.receivable_aggregates:
+            return self.xno_interface.receivable_exists(account, amount)
+
         receivable = self.xno_interface.receivable(account, amount)
 
         if receivable:
@@ -224,6 +707,9 @@ class Gate():
 
         Output: int - raw total
         """
+        if self.xno_interface.receivable_aggregates:
+            return self.xno_interface.receivable_total(account)
+
         total = 0
 
         for payment in self.xno_interface.receivable(account, 1):
@@ -231,23 +717,83 @@ class Gate():
 
         return total
 
+    def total_receivable_many(self, accounts):
+        """What's the total receivable to each of {accounts}? Uses a single batched lookup where the interface supports it.
+
+        Arguments:
+            accounts: iterable of str, the nano public addresses to check
+
+        Output: dict of account: int - raw total
+        """
+        if self.xno_interface.receivable_aggregates:
+            return self.xno_interface.receivable_total_many(accounts)
+
+        return {account: sum(payment.amount for payment in receivable)
+                for account, receivable in self.xno_interface.receivable_many(accounts, 1).items()}
+
     def add_key(self, account, amount, timeout, receivable=False):
         """Add a Key that can make the gate "unlocked."
 
+        Several keys for the same account are tiers, such as 1 nano for an hour or 10 nano for a day. They are all checked against one fetch of the account's history. Adding a key with the same amount and timeout as an existing tier replaces it.
+
         Arguments:
             account: str, the nano public address to check
             amount: int, amount in raw
             timout: int, number of seconds gate should unlocked after a payment to the account is made
             receivable: boolean, do we care about payments that are receivable but not yet received?
         """
-        self.keys[account] = Key(account, amount, timeout, receivable)
+        tiers = [key for key in self.keys.get(account, []) if (key.amount, key.timeout) != (amount, timeout)]
+        tiers.append(Key(account, amount, timeout, receivable))
+        self.keys[account] = sorted(tiers, key=lambda k: (-k.timeout, k.amount))
+
+    def accept(self, account, payment):
+        """Apply a payment learned of outside the RPC lookups, such as a websocket confirmation, to the cached verdict. The verdict is only ever extended.
+
+        Arguments:
+            account: str, the nano public address that was paid
+            payment: payment.Received, or payment.Receivable if the payment is not yet received
+
+        Output: a future datetime (when the gate will be locked again) if the payment unlocks the gate, or None.
+        """
+        now = datetime.now()
+        until = None
+
+        # tiers are longest timeout first, so the first one the payment satisfies holds the gate open longest
+        for key in self.keys.get(account, []):
+            if payment.amount < key.amount:
+                continue
+
+            if isinstance(payment, Received):
+                until = payment.time + timedelta(seconds=key.timeout)
+                break
+
+            if key.receivable:
+                until = now + timedelta(seconds=key.timeout)
+                break
+
+        if until is None or until <= now:
+            return
+
+        lock_state = self.xno_interface.load_lock_state()
+
+        if lock_state and lock_state.unlocked and lock_state.until >= until:
+            return lock_state.until
+
+        self.xno_interface.save_lock_state(True, until)
+        return until
 
     def unlocked(self):
         """Is the gate unlocked?
             Output: a future datetime (when it will be locked again) if unlocked, or None if locked.
         """
         now = datetime.now()
-        lock_state = self.xno_interface.load_lock_state()
+
+        if self.instrumentation is None:
+            lock_state = self.xno_interface.load_lock_state()
+        else:
+            start = time.perf_counter()
+            lock_state = self.xno_interface.load_lock_state()
+            self.instrumentation.lock_state(bool(lock_state and lock_state.until > now), time.perf_counter() - start)
 
         # Defer to cache
         if lock_state and lock_state.until > now:
@@ -257,23 +803,174 @@ class Gate():
 
             return
 
-        # Check keys
-        for key in sorted(self.keys.values(), key=lambda k: k.timeout, reverse=True):
-            timeout = timedelta(seconds=key.timeout)
-            cutoff = now - timeout
+        return self.refresh(now)
 
-            if key.receivable and self.has_receivable(key.account, key.amount):
-                self.xno_interface.save_lock_state(True, now + timeout)
-                return now + timeout
+    def refresh(self, now=None, receivable=None):
+        """Check the keys, ignoring any cached verdict, and save the result.
+
+        Arguments:
+            now: optional datetime to check as of. Default is now.
+            receivable: optional prefetched receivables, per Gate._receivable_for, covering this gate's receivable keys.
+
+        Output: a future datetime (when it will be locked again) if unlocked, or None if locked.
+        """
+        until = self.check(now, receivable)
 
-            payment = self.been_paid(key.account, key.amount)
-            if payment and payment > cutoff:
-                self.xno_interface.save_lock_state(True, payment + timeout)
-                return payment + timeout
+        if until:
+            self.xno_interface.save_lock_state(True, until)
+            return until
 
         self.xno_interface.save_lock_state(False)
         return
 
+    def check(self, now=None, receivable=None):
+        """Would the keys hold the gate unlocked as of {now}? Neither reads nor saves the cached verdict.
+
+        Arguments:
+            now: optional datetime to check as of, possibly in the future. Default is now.
+            receivable: optional prefetched receivables, per Gate._receivable_for.
+
+        Output: the datetime the gate stays unlocked until, or None if locked.
+        """
+        return self._check_keys(now or datetime.now(), receivable)
+
+    def _check_keys(self, now, receivable=None):
+        """Produce the datetime the longest timeout unlocking key holds the gate open until, or None."""
+        if self.instrumentation is None:
+            return self._evaluate(now, receivable)[0]
+
+        start = time.perf_counter()
+        until, key, evaluated = self._evaluate(now, receivable)
+        self.instrumentation.keys_evaluated(evaluated, time.perf_counter() - start)
+
+        if until:
+            self.instrumentation.unlocked_by(key, until)
+
+        return until
+
+    def _evaluate(self, now, receivable=None):
+        """Check accounts in order of their longest key until the longest timeout unlocking key is known. Every tier of an account is checked against one fetch of its history.
+
+        With an executor, every account is dispatched at once. Results are still read in order, so the outcome matches the serial check; once it is decided, outstanding checks are cancelled.
+
+        Receivables are fetched for every key up front only when the interface batches the lookup. Otherwise each key looks up its own, so a serial check that stops early doesn't pay for the keys it skips.
+
+        Output: (until or None, the unlocking Key or None, number of keys evaluated)
+        """
+        accounts = self._sorted_accounts()
+
+        if receivable is None and self.xno_interface.receivable_batched:
+            receivable = self._receivable_for(self._sorted_keys())
+
+        if self.executor is None:
+            checks = ((tiers, lambda tiers=tiers: self._check_account(tiers, now, receivable)) for tiers in accounts)
+        else:
+            futures = [self.executor.submit(self._check_account, tiers, now, receivable) for tiers in accounts]
+            checks = ((tiers, future.result) for tiers, future in zip(accounts, futures))
+
+        until, unlocking, evaluated = None, None, 0
+
+        try:
+            for tiers, check in checks:
+                # no key of this account, or any later one, can beat the one found
+                if unlocking is not None and tiers[0].timeout <= unlocking.timeout:
+                    break
+
+                found, key = check()
+                evaluated += len(tiers)
+
+                if found and (unlocking is None or key.timeout > unlocking.timeout):
+                    until, unlocking = found, key
+        finally:
+            if self.executor is not None:
+                for future in futures:
+                    future.cancel()
+
+        return until, unlocking, evaluated
+
+    def _sorted_keys(self):
+        """Produce every key, longest timeout first."""
+        return sorted((key for tiers in self.keys.values() for key in tiers), key=lambda k: k.timeout, reverse=True)
+
+    def _sorted_accounts(self):
+        """Produce each account's tiers, accounts in the order they are checked: longest key timeout first."""
+        return sorted(self.keys.values(), key=lambda tiers: tiers[0].timeout, reverse=True)
+
+    def _check_account(self, tiers, now, receivable=None):
+        """Which of one account's keys unlocks the gate as of {now}?
+
+        Arguments:
+            tiers: Array of Key for one account, longest timeout first
+            now: datetime
+            receivable: optional prefetched receivables, per Gate._receivable_for. Looked up for this account alone when missing.
+
+        Output: (until or None, the unlocking Key or None)
+        """
+        # a single key, or an indexed backend, costs no more asked key by key
+        if len(tiers) == 1 or self.xno_interface.received_indexed:
+            for key in tiers:
+                until = self._check_key(key, now, receivable)
+
+                if until:
+                    return until, key
+
+            return None, None
+
+        account = tiers[0].account
+        amounts = [key.amount for key in tiers if key.receivable]
+        pending = None
+
+        if amounts:
+            if receivable is not None and account in receivable:
+                pending = receivable[account]
+            else:
+                pending = self.xno_interface.receivable(account, min(amounts)) or []
+
+        return _unlocking_tier(tiers, self._received(account), pending, now)
+
+    def _receivable_for(self, keys):
+        """Fetch the receivables for every receivable key in one batched lookup.
+
+        Output: dict of account: Array of payment.Receivable, down to the smallest key amount.
+        """
+        receivable_keys = [key for key in keys if key.receivable]
+
+        if not receivable_keys:
+            return dict()
+
+        threshold = min(key.amount for key in receivable_keys)
+        accounts = list(dict.fromkeys(key.account for key in receivable_keys))
+        return self.xno_interface.receivable_many(accounts, threshold)
+
+    def _check_key(self, key, now, receivable=None):
+        """Does {key} unlock the gate as of {now}?
+
+        Arguments:
+            key: Key
+            now: datetime
+            receivable: optional prefetched receivables, per Gate._receivable_for. Looked up for this key alone when missing.
+
+        Output: a future datetime (when the key stops holding the gate open), or None.
+        """
+        timeout = timedelta(seconds=key.timeout)
+        cutoff = now - timeout
+
+        if key.receivable:
+
+            if receivable is not None and key.account in receivable:
+                has_receivable = any(payment.amount >= key.amount for payment in receivable[key.account])
+            else:
+                has_receivable = self.has_receivable(key.account, key.amount)
+
+            if has_receivable:
+                return now + timeout
+
+        payment = self.been_paid(key.account, key.amount, since=cutoff)
+        if payment and payment > cutoff:
+            return payment + timeout
+
+        return
+
     @staticmethod
     def to_raw(x):
         "Convert nano units to raw units."
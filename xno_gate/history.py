@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import json
+import threading
+
+from xno_gate.entities import Received, ReceivedBatch
+
+"Keep each account's received payments locally, so the RPC only needs to be asked for blocks newer than the ones already seen."
+
+
+class HistoryStore:
+
+    def __init__(self, path=None):
+        """Remember the received payments and the newest block seen (the frontier) for each account.
+
+        Arguments:
+            path: optional pathlib.Path to a log file. When given, the store is replayed from it on load, and every update appends one line holding just that update, so a sync costs the size of its new blocks rather than of the whole store.
+        """
+        self._path = path
+        self._accounts = dict()
+        self._lock = threading.Lock()
+
+        if path is not None and path.exists():
+            self._load()
+
+    def _load(self):
+        """Replay the log. A line cut short by a crash is skipped, and json files from before the log hold the whole store on one line."""
+        with open(self._path, "r") as f:
+            text = f.read()
+
+        for line in text.splitlines():
+            try:
+                update = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if "account" not in update:
+                self._accounts.update(update)
+                continue
+
+            entry = self._accounts.get(update["account"])
+            older = entry["received"] if entry else []
+            self._accounts[update["account"]] = {"frontier": update["frontier"], "timestamp": update["timestamp"], "received": update["received"] + older}
+
+        # end a torn last line, so the next update starts on a line of its own
+        if text and not text.endswith("\n"):
+            with open(self._path, "a") as f:
+                f.write("\n")
+
+    def frontier(self, account):
+        """Produce the (block hash, local timestamp) of the newest block seen for {account}, or None if the account has never been synced."""
+        entry = self._accounts.get(account)
+
+        if entry is None:
+            return
+
+        return entry["frontier"], entry["timestamp"]
+
+    def received(self, account):
+        """Produce the stored Received payments for {account}, newest first."""
+        entry = self._accounts.get(account)
+
+        if entry is None:
+            return []
+
+        return [Received(int(amount), datetime.fromtimestamp(timestamp)) for amount, timestamp in entry["received"]]
+
+    def received_batch(self, account):
+        """Produce the stored payments for {account} as a ReceivedBatch, newest first."""
+        batch = ReceivedBatch()
+        entry = self._accounts.get(account)
+
+        if entry is not None:
+            for amount, timestamp in entry["received"]:
+                batch.append(int(amount), timestamp)
+
+        return batch
+
+    def extend(self, account, received, frontier, timestamp, previous=None):
+        """Add payments newer than the stored frontier.
+
+        Arguments:
+            account: str, nano public address
+            received: Array of payment.Received, newest first, all newer than {previous}
+            frontier: str, hash of the newest block fetched
+            timestamp: int, local timestamp of the newest block fetched
+            previous: the frontier hash the new blocks were fetched against. If another sync moved the frontier in the meantime, the update is dropped rather than stored twice.
+
+        Output: boolean, was the update stored?
+        """
+        fresh = [[str(payment.amount), int(payment.time.timestamp())] for payment in received]
+
+        with self._lock:
+            entry = self._accounts.get(account)
+            current = entry["frontier"] if entry else None
+
+            if current != previous:
+                return False
+
+            older = entry["received"] if entry else []
+            self._accounts[account] = {"frontier": frontier, "timestamp": timestamp, "received": fresh + older}
+
+            if self._path is not None:
+                self._append({"account": account, "frontier": frontier, "timestamp": timestamp, "received": fresh})
+
+        return True
+
+    def _append(self, update):
+        """Append one update to the log, in a single write."""
+        with open(self._path, "a") as f:
+            f.write(json.dumps(update) + "\n")
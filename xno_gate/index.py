@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import math
+import sqlite3
+import threading
+import time
+
+from xno_gate.entities import LockState, Received, ReceivedBatch, Receivable
+from xno_gate.gate import XnoInterface
+from xno_gate.lockstate import DEFAULT_GATE, SQLiteLockStore
+
+"A durable local index of each account's payments, so historical questions are answered from SQLite instead of the RPC."
+
+# Raw amounts are stored as zero padded decimal text, so text order is numeric order and 128 bit amounts stay exact.
+_DIGITS = 39
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (account TEXT PRIMARY KEY, hash TEXT NOT NULL, timestamp INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS received (account TEXT NOT NULL, time INTEGER NOT NULL, amount TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS received_time ON received (account, time);
+CREATE INDEX IF NOT EXISTS received_amount ON received (account, amount);
+CREATE TABLE IF NOT EXISTS receivable (account TEXT NOT NULL, amount TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS receivable_amount ON receivable (account, amount);
+"""
+
+
+def _pad(amount):
+    return "{:0{}d}".format(int(amount), _DIGITS)
+
+
+def _seconds(when):
+    """Stored times are whole seconds, so a fractional bound is rounded up: time >= and time < then compare as they would against the datetime."""
+    return math.ceil(when.timestamp())
+
+
+class PaymentIndex(XnoInterface):
+
+    received_ordered = True
+    received_columnar = True
+    received_indexed = True
+
+    def __init__(self, path, rpc=None, max_age=None, lock_store=None, lock_name=DEFAULT_GATE, rate_limit=60):
+        """Keep received and receivable blocks per account in a SQLite database, indexed by (account, time) and (account, amount).
+
+        Fill it with ingest(), which fetches only the blocks newer than each account's stored frontier, so a restart picks up where the last run stopped. Queries never touch the network unless max_age asks them to.
+
+        Arguments:
+            path: pathlib.Path to the database file.
+            rpc: optional DefaultRPCInterface to ingest from.
+            max_age: optional float, seconds. When set with an rpc, a query about an account not ingested for that long ingests it first.
+            lock_store: optional LockStore for unlocked/locked lookup results. Default is a SQLiteLockStore in the same database.
+            lock_name: str, the name this interface's verdict is kept under in the lock store.
+            rate_limit: int, default number of seconds to apply on cached unlocked/locked lookup results.
+        """
+        self.path = path
+        self.rpc = rpc
+        self.max_age = max_age
+        self.lock_name = lock_name
+        self._rate_limit = rate_limit
+        self._connections = threading.local()
+        self._ingested = dict()
+
+        db = self._connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+
+        self.lock_store = lock_store or SQLiteLockStore(path)
+
+    def _connection(self):
+        """One connection per thread, in autocommit mode so writes manage their own transactions."""
+        db = getattr(self._connections, "db", None)
+
+        if db is None:
+            db = self._connections.db = sqlite3.connect(self.path, isolation_level=None)
+
+        return db
+
+    # Ingest
+
+    def ingest(self, account, receivable=True):
+        """Fetch new blocks for {account} from the rpc into the index.
+
+        Arguments:
+            account: str, nano public address
+            receivable: boolean, also replace the stored receivable blocks?
+        """
+        self.ingest_many([account], receivable)
+
+    def ingest_many(self, accounts, receivable=True):
+        """Fetch new blocks for several accounts, with one receivable lookup for all of them."""
+        if self.rpc is None:
+            raise ValueError("PaymentIndex needs an rpc interface to ingest from.")
+
+        accounts = list(accounts)
+
+        for account in accounts:
+            self.rpc.sync_history(account, self)
+
+        if receivable:
+            for account, blocks in self.rpc.receivable_many(accounts, 1).items():
+                self._replace_receivable(account, blocks)
+
+        for account in accounts:
+            self._ingested[account] = time.monotonic()
+
+    def _refresh(self, account):
+        """Ingest {account} first if max_age says the index is too old to answer."""
+        if self.rpc is None or self.max_age is None:
+            return
+
+        ingested = self._ingested.get(account)
+
+        if ingested is None or time.monotonic() - ingested > self.max_age:
+            self.ingest(account)
+
+    def _replace_receivable(self, account, blocks):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+
+        try:
+            db.execute("DELETE FROM receivable WHERE account = ?", (account,))
+            db.executemany("INSERT INTO receivable (account, amount) VALUES (?, ?)", [(account, _pad(block.amount)) for block in blocks])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    # HistoryStore, for DefaultRPCInterface.sync_history
+
+    def frontier(self, account):
+        """Produce the (block hash, local timestamp) of the newest block indexed for {account}, or None if it has never been ingested."""
+        row = self._connection().execute("SELECT hash, timestamp FROM frontier WHERE account = ?", (account,)).fetchone()
+
+        if row is None:
+            return
+
+        return row[0], row[1]
+
+    def extend(self, account, received, frontier, timestamp, previous=None):
+        """Add payments newer than the stored frontier. See HistoryStore.extend.
+
+        Output: boolean, was the update stored?
+        """
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = db.execute("SELECT hash FROM frontier WHERE account = ?", (account,)).fetchone()
+
+            if (row[0] if row else None) != previous:
+                db.execute("ROLLBACK")
+                return False
+
+            # Oldest first, so a later rowid is always a newer payment.
+            db.executemany("INSERT INTO received (account, time, amount) VALUES (?, ?, ?)",
+                           [(account, int(payment.time.timestamp()), _pad(payment.amount)) for payment in reversed(received)])
+            db.execute("INSERT OR REPLACE INTO frontier (account, hash, timestamp) VALUES (?, ?, ?)", (account, frontier, timestamp))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        return True
+
+    def received_batch(self, account):
+        """Produce the indexed payments for {account} as a ReceivedBatch, newest first."""
+        batch = ReceivedBatch()
+
+        for amount, timestamp in self._rows(account):
+            batch.append(int(amount), timestamp)
+
+        return batch
+
+    # Queries
+
+    def _rows(self, account, start=None, end=None, minimum=None):
+        """Produce (amount text, timestamp) rows for {account}, newest first, within the given range."""
+        query = "SELECT amount, time FROM received WHERE account = ?"
+        parameters = [account]
+
+        if start is not None:
+            query += " AND time >= ?"
+            parameters.append(_seconds(start))
+
+        if end is not None:
+            query += " AND time < ?"
+            parameters.append(_seconds(end))
+
+        if minimum is not None:
+            query += " AND amount >= ?"
+            parameters.append(_pad(minimum))
+
+        return self._connection().execute(query + " ORDER BY time DESC, rowid DESC", parameters)
+
+    def payments(self, account, start=None, end=None, minimum=None):
+        """Produce the Received payments to {account}, newest first, from {start} until {end}, of at least {minimum}.
+
+        Arguments:
+            account: str, nano public address
+            start: optional datetime, inclusive
+            end: optional datetime, exclusive
+            minimum: optional int, smallest amount in raw
+
+        Output: Array of payment.Received
+        """
+        self._refresh(account)
+        return [Received(int(amount), datetime.fromtimestamp(timestamp)) for amount, timestamp in self._rows(account, start, end, minimum)]
+
+    def received(self, account):
+        return self.payments(account)
+
+    def iter_received(self, account):
+        self._refresh(account)
+
+        for amount, timestamp in self._rows(account):
+            yield Received(int(amount), datetime.fromtimestamp(timestamp))
+
+    def iter_received_batches(self, account):
+        self._refresh(account)
+        yield self.received_batch(account)
+
+    def last_paid(self, account, amount, since=None):
+        self._refresh(account)
+        query = "SELECT MAX(time) FROM received WHERE account = ? AND amount >= ?"
+        parameters = [account, _pad(amount)]
+
+        if since is not None:
+            query += " AND time >= ?"
+            parameters.append(_seconds(since))
+
+        row = self._connection().execute(query, parameters).fetchone()
+
+        if row[0] is None:
+            return
+
+        return datetime.fromtimestamp(row[0])
+
+    def total_received(self, account, start, end=None):
+        self._refresh(account)
+        return sum(int(amount) for amount, _ in self._rows(account, start, end))
+
+    def receivable(self, account, threshold=10 ** 30):
+        self._refresh(account)
+        rows = self._connection().execute("SELECT amount FROM receivable WHERE account = ? AND amount >= ?", (account, _pad(threshold)))
+        return [Receivable(int(amount)) for amount, in rows]
+
+    def save_lock_state(self, unlocked, until=None):
+
+        if until is None:
+            until = datetime.now() + timedelta(seconds=self._rate_limit)
+
+        self.lock_store.save(LockState(unlocked, until), self.lock_name)
+
+    def load_lock_state(self):
+        return self.lock_store.load(self.lock_name)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import abc
+from datetime import datetime
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+
+from xno_gate.entities import LockState
+
+"Places to keep cached unlocked/locked verdicts, from a dict in memory to files shared by several worker processes."
+
+DEFAULT_GATE = "default"
+
+
+class LockStore(abc.ABC):
+
+    def __init__(self):
+        """Keep LockStates by gate name. Every store keeps an in-process copy of each verdict, and doesn't touch its backend again while that copy is still in the future.
+
+        Note that a verdict saved by another process is only picked up once the local copy expires.
+        """
+        self._local = dict()
+
+    @abc.abstractmethod
+    def _read(self, name):
+        """Read the LockState for gate {name} from the backend, or None."""
+        pass
+
+    @abc.abstractmethod
+    def _write(self, name, lock_state):
+        """Atomically write the LockState for gate {name} to the backend."""
+        pass
+
+    def load(self, name=DEFAULT_GATE):
+        """Produce the saved LockState for gate {name}, or None."""
+        lock_state = self._local.get(name)
+
+        if lock_state is not None and lock_state.until > datetime.now():
+            return lock_state
+
+        lock_state = self._read(name)
+
+        if lock_state is not None:
+            self._local[name] = lock_state
+
+        return lock_state
+
+    def save(self, lock_state, name=DEFAULT_GATE):
+        """Save a LockState for gate {name}."""
+        self._write(name, lock_state)
+        self._local[name] = lock_state
+
+
+class MemoryLockStore(LockStore):
+    """Keep verdicts in this process only."""
+
+    def _read(self, name):
+        return
+
+    def _write(self, name, lock_state):
+        return
+
+
+class JSONLockStore(LockStore):
+
+    def __init__(self, path):
+        """Keep verdicts in a json file, replaced atomically on every save.
+
+        Arguments:
+            path: pathlib.Path to the json file.
+        """
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read_all(self):
+        if not self.path.exists():
+            return dict()
+
+        with open(self.path, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return dict()
+
+        # Files written before named gates hold a single verdict.
+        if "unlocked" in data:
+            return {DEFAULT_GATE: data}
+
+        return data
+
+    def _read(self, name):
+        data = self._read_all().get(name)
+
+        if data is None:
+            return
+
+        return LockState(data["unlocked"], datetime.fromtimestamp(data["until"]))
+
+    def _write(self, name, lock_state):
+        with self._lock:
+            data = self._read_all()
+            data[name] = {"unlocked": lock_state.unlocked, "until": lock_state.until.timestamp()}
+
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+
+                os.replace(temp, self.path)
+            except BaseException:
+                os.unlink(temp)
+                raise
+
+
+class MmapLockStore(LockStore):
+
+    # sequence, name hash, unlocked, until
+    _SLOT = struct.Struct("<IxxxxQ?xxxxxxxd")
+
+    # A reader gives up on a slot after this many tries, about 10ms with backoff, and treats it as a miss.
+    _READ_TRIES = 100
+
+    def __init__(self, path, slots=64):
+        """Keep verdicts in a memory mapped file of fixed size slots, shared by every process that maps it.
+
+        Readers never lock: each slot carries a sequence number that is odd while a write is in progress, and readers retry until they see the same even number before and after reading. A slot that stays odd, because its writer died mid-write, is read as a miss, so the verdict is recomputed and the next save repairs the slot. Writers serialize on a file lock.
+
+        Arguments:
+            path: pathlib.Path to the shared file. Created zero filled if missing.
+            slots: int, how many gates the file can hold. Every process must use the same number.
+        """
+        super().__init__()
+        self.path = path
+        self.slots = slots
+        size = slots * self._SLOT.size
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(name):
+        return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little") or 1
+
+    def _slots_for(self, name_hash):
+        """Produce slot offsets in probe order for {name_hash}."""
+        start = name_hash % self.slots
+
+        for n in range(self.slots):
+            yield ((start + n) % self.slots) * self._SLOT.size
+
+    def _read_slot(self, offset):
+        """Produce (name hash, unlocked, until) from a consistent read of the slot at {offset}, or None if it stays mid-write."""
+        for attempt in range(self._READ_TRIES):
+            sequence, name_hash, unlocked, until = self._SLOT.unpack_from(self._map, offset)
+
+            if sequence % 2 == 0 and struct.unpack_from("<I", self._map, offset)[0] == sequence:
+                return name_hash, unlocked, until
+
+            # a live writer finishes in microseconds; back off rather than spin
+            if attempt >= 10:
+                time.sleep(0.0001)
+
+        return
+
+    def _read(self, name):
+        name_hash = self._hash(name)
+
+        for offset in self._slots_for(name_hash):
+            slot = self._read_slot(offset)
+
+            if slot is None:
+                return
+
+            slot_hash, unlocked, until = slot
+
+            if slot_hash == name_hash:
+                return LockState(unlocked, datetime.fromtimestamp(until))
+
+            if slot_hash == 0:
+                return
+
+    def _write(self, name, lock_state):
+        import fcntl
+
+        name_hash = self._hash(name)
+
+        with self._lock, open(self.path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+            try:
+                for offset in self._slots_for(name_hash):
+                    # Writers hold the file lock, so the slot can be read directly.
+                    slot_hash = struct.unpack_from("<Q", self._map, offset + 8)[0]
+
+                    if slot_hash in (0, name_hash):
+                        break
+                else:
+                    raise ValueError(f"Lock state file {self.path} has no free slot for gate {name}.")
+
+                # An odd sequence here means a writer died mid-write; carry on from it.
+                sequence = struct.unpack_from("<I", self._map, offset)[0] | 1
+                struct.pack_into("<I", self._map, offset, sequence)
+                self._SLOT.pack_into(self._map, offset, sequence, name_hash, lock_state.unlocked, lock_state.until.timestamp())
+                struct.pack_into("<I", self._map, offset, (sequence + 1) % 2 ** 32)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+
+
+class SQLiteLockStore(LockStore):
+
+    def __init__(self, path):
+        """Keep verdicts in a SQLite database in WAL mode, so readers in other processes never wait on a writer.
+
+        Arguments:
+            path: pathlib.Path to the database file.
+        """
+        super().__init__()
+        self.path = path
+        self._connections = threading.local()
+
+        with self._connection() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS lock_state (name TEXT PRIMARY KEY, unlocked INTEGER NOT NULL, until REAL NOT NULL)")
+
+    def _connection(self):
+        """One connection per thread."""
+        db = getattr(self._connections, "db", None)
+
+        if db is None:
+            db = self._connections.db = sqlite3.connect(self.path)
+
+        return db
+
+    def _read(self, name):
+        row = self._connection().execute("SELECT unlocked, until FROM lock_state WHERE name = ?", (name,)).fetchone()
+
+        if row is None:
+            return
+
+        return LockState(bool(row[0]), datetime.fromtimestamp(row[1]))
+
+    def _write(self, name, lock_state):
+        with self._connection() as db:
+            db.execute("INSERT OR REPLACE INTO lock_state (name, unlocked, until) VALUES (?, ?, ?)",
+                       (name, int(lock_state.unlocked), lock_state.until.timestamp()))
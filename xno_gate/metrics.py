@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left
+import threading
+
+"Hooks for seeing where the time goes in Gate.unlocked, with a Prometheus exporter and a callback adapter."
+
+
+class Instrumentation:
+    """Receives events from Gate and DefaultRPCInterface. Every method does nothing; override the ones you need.
+
+    Nothing is timed or reported unless an Instrumentation is given, so the cost when disabled is a None check.
+    """
+
+    def lock_state(self, hit, seconds):
+        """The cached verdict was loaded, taking {seconds}. {hit} is True if it was still valid."""
+        pass
+
+    def rpc(self, action, seconds, size):
+        """An RPC {action} round trip took {seconds} and returned {size} bytes."""
+        pass
+
+    def decode(self, action, seconds):
+        """Decoding the response to an RPC {action} took {seconds}."""
+        pass
+
+    def keys_evaluated(self, count, seconds):
+        """Deciding a verdict evaluated {count} keys in {seconds}."""
+        pass
+
+    def unlocked_by(self, key, until):
+        """{key} unlocked the gate, until {until}."""
+        pass
+
+
+class CallbackInstrumentation(Instrumentation):
+
+    def __init__(self, callback):
+        """Pass every event to {callback}(event name, **fields)."""
+        self.callback = callback
+
+    def lock_state(self, hit, seconds):
+        self.callback("lock_state", hit=hit, seconds=seconds)
+
+    def rpc(self, action, seconds, size):
+        self.callback("rpc", action=action, seconds=seconds, size=size)
+
+    def decode(self, action, seconds):
+        self.callback("decode", action=action, seconds=seconds)
+
+    def keys_evaluated(self, count, seconds):
+        self.callback("keys_evaluated", count=count, seconds=seconds)
+
+    def unlocked_by(self, key, until):
+        self.callback("unlocked_by", key=key, until=until)
+
+
+class _Histogram:
+
+    def __init__(self, buckets):
+        """Cumulative bucket counts, a sum and a count, per the Prometheus histogram type."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics(Instrumentation):
+
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    KEY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 1000, 10000)
+
+    def __init__(self, prefix="xno_gate"):
+        """Collect events into counters and histograms, exposed in the Prometheus text format by expose().
+
+        Arguments:
+            prefix: str, prepended to every metric name.
+        """
+        self.prefix = prefix
+        self._counters = dict()
+        self._histograms = dict()
+        self._help = dict()
+        self._lock = threading.Lock()
+
+    def _count(self, name, labels=(), amount=1):
+        key = (name, labels)
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _observe(self, name, value, buckets, labels=()):
+        key = (name, labels)
+
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = _Histogram(buckets)
+
+            self._histograms[key].observe(value)
+
+    def lock_state(self, hit, seconds):
+        self._count("lock_state_cache_total", (("result", "hit" if hit else "miss"),))
+        self._observe("lock_state_load_seconds", seconds, self.LATENCY_BUCKETS)
+
+    def rpc(self, action, seconds, size):
+        labels = (("action", action),)
+        self._observe("rpc_seconds", seconds, self.LATENCY_BUCKETS, labels)
+        self._count("rpc_received_bytes_total", labels, size)
+
+    def decode(self, action, seconds):
+        self._observe("rpc_decode_seconds", seconds, self.LATENCY_BUCKETS, (("action", action),))
+
+    def keys_evaluated(self, count, seconds):
+        self._observe("keys_evaluated", count, self.KEY_BUCKETS)
+        self._observe("key_evaluation_seconds", seconds, self.LATENCY_BUCKETS)
+
+    def unlocked_by(self, key, until):
+        self._count("unlocked_by_total", (("account", key.account), ("timeout", str(key.timeout))))
+
+    def counter(self, name, **labels):
+        """Produce the current value of a counter, for tests and ad hoc checks."""
+        return self._counters.get((name, tuple(labels.items())), 0)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+
+        if not pairs:
+            return ""
+
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def expose(self):
+        """Produce every metric in the Prometheus text exposition format."""
+        lines = list()
+        typed = set()
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                full = f"{self.prefix}_{name}"
+
+                if full not in typed:
+                    lines.append(f"# TYPE {full} counter")
+                    typed.add(full)
+
+                lines.append(f"{full}{self._labels(labels)} {value}")
+
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                full = f"{self.prefix}_{name}"
+
+                if full not in typed:
+                    lines.append(f"# TYPE {full} histogram")
+                    typed.add(full)
+
+                cumulative = 0
+
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{full}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+
+                lines.append(f"{full}_sum{self._labels(labels)} {histogram.sum}")
+                lines.append(f"{full}_count{self._labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+from email.utils import formatdate
+import threading
+import time
+
+"WSGI and ASGI middleware that gate routes on an in-memory verdict, refreshed in the background so requests never wait on the RPC."
+
+
+class _Verdict:
+
+    __slots__ = ("until", "until_ts", "expires", "future", "cold")
+
+    def __init__(self, until, expires, cold=False):
+        self.until = until
+        self.until_ts = until.timestamp() if until else 0
+        self.expires = expires
+        self.future = None
+        self.cold = cold
+
+
+class GateVerdicts:
+
+    def __init__(self, stale=60, lead=5, retry=10, executor=None, first_wait=0):
+        """Keep each gate's verdict in memory, revalidating it in the background once it goes stale. A stale verdict is still served while it is rechecked.
+
+        A gate starts from its saved lock state. With none saved, it is locked until its first refresh finishes, so a paid route answers 402 on a cold start unless first_wait is set.
+
+        Arguments:
+            stale: float, seconds a locked verdict is served before it is rechecked.
+            lead: float, seconds before an unlocked verdict lapses that it is rechecked, so a renewed payment keeps the gate open without a gap.
+            retry: float, seconds to wait before rechecking after a failed refresh. The previous verdict is kept meanwhile.
+            executor: optional concurrent.futures.Executor to refresh on. Default is a small thread pool.
+            first_wait: float, seconds a request may wait for a gate's first refresh when no lock state is saved. Default is not to wait.
+        """
+        self.stale = stale
+        self.lead = lead
+        self.retry = retry
+        self.executor = executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix="xno-gate-verdicts")
+        self.first_wait = first_wait
+        self._verdicts = dict()
+        self._lock = threading.Lock()
+
+    def _expires(self, until, now):
+        """When should a verdict decided at {now} be rechecked?"""
+        if until is None:
+            return now + self.stale
+
+        ahead = until.timestamp() - self.lead
+        return ahead if ahead > now else until.timestamp()
+
+    def _seed(self, gate):
+        """Start from the gate's saved lock state, which costs a cache read but never an RPC call."""
+        lock_state = gate.xno_interface.load_lock_state()
+
+        if lock_state is None:
+            return _Verdict(None, 0, cold=True)
+
+        # whoever saved it may not have looked ahead, so an unlocked verdict is rechecked lead seconds before it lapses
+        until = lock_state.until if lock_state.unlocked else None
+        return _Verdict(until, until.timestamp() - self.lead if until else lock_state.until.timestamp())
+
+    def _revalidate(self, gate):
+        now = time.time()
+
+        try:
+            until = gate.refresh()
+            verdict = _Verdict(until, self._expires(until, now))
+        except Exception:
+            verdict = self._verdicts[gate]
+            verdict = _Verdict(verdict.until, now + self.retry)
+
+        with self._lock:
+            self._verdicts[gate] = verdict
+
+    def _current(self, gate, now):
+        """Produce the _Verdict held for {gate}, starting a background refresh if it is stale."""
+        verdict = self._verdicts.get(gate)
+
+        if verdict is None:
+            with self._lock:
+                verdict = self._verdicts.get(gate) or self._verdicts.setdefault(gate, self._seed(gate))
+
+        if verdict.expires <= now and verdict.future is None:
+            with self._lock:
+                if verdict.future is None:
+                    verdict.future = self.executor.submit(self._revalidate, gate)
+
+        return verdict
+
+    def _answer(self, gate, verdict):
+        # a cold verdict is replaced once its first refresh finishes
+        if verdict.cold and verdict.future.done():
+            verdict = self._verdicts[gate]
+
+        if verdict.until_ts > time.time():
+            return verdict.until
+
+        return
+
+    def verdict(self, gate):
+        """Is {gate} unlocked? Answers from memory, starting a background refresh if the verdict is stale. Waits up to first_wait for a gate's first refresh.
+
+        Output: a future datetime (when it will be locked again) if unlocked, or None if locked.
+        """
+        verdict = self._current(gate, time.time())
+
+        if verdict.cold and self.first_wait:
+            wait([verdict.future], self.first_wait)
+
+        return self._answer(gate, verdict)
+
+    async def verdict_async(self, gate):
+        """verdict() for asyncio: waits for a gate's first refresh without blocking the event loop."""
+        verdict = self._current(gate, time.time())
+
+        if verdict.cold and self.first_wait:
+            await asyncio.wait([asyncio.wrap_future(verdict.future)], timeout=self.first_wait)
+
+        return self._answer(gate, verdict)
+
+    def join(self, timeout=None):
+        """Wait for the refreshes in flight to finish."""
+        wait([verdict.future for verdict in list(self._verdicts.values()) if verdict.future is not None], timeout)
+
+
+def cache_headers(until):
+    """Produce Cache-Control and Expires headers that let caches keep a response until {until}, when the gate locks again."""
+    max_age = max(0, int(until.timestamp() - time.time()))
+    return [("Cache-Control", f"public, max-age={max_age}"), ("Expires", formatdate(until.timestamp(), usegmt=True))]
+
+
+class _Routes:
+
+    def __init__(self, routes, verdicts=None, headers=True):
+        """Map path prefixes to gates.
+
+        Arguments:
+            routes: dict of path prefix: Gate. The longest matching prefix wins; paths matching no prefix are not gated.
+            verdicts: optional GateVerdicts, to share verdicts between several middleware instances.
+            headers: boolean, add Cache-Control and Expires headers to responses from unlocked routes?
+        """
+        self.routes = sorted(((prefix.rstrip("/"), gate) for prefix, gate in routes.items()), key=lambda route: len(route[0]), reverse=True)
+        self.verdicts = verdicts or GateVerdicts()
+        self.headers = headers
+
+    def gate_for(self, path):
+        """Produce the Gate for {path}, or None if it is not gated."""
+        for prefix, gate in self.routes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return gate
+
+        return
+
+
+class GateMiddleware(_Routes):
+
+    LOCKED_BODY = b"Payment required"
+
+    def __init__(self, app, routes, verdicts=None, headers=True, locked=None):
+        """WSGI middleware answering 402 Payment Required on locked routes.
+
+        Arguments:
+            app: the WSGI application to wrap.
+            routes, verdicts, headers: see _Routes.
+            locked: optional WSGI application to answer locked routes instead.
+        """
+        super().__init__(routes, verdicts, headers)
+        self.app = app
+        self.locked = locked or self._locked
+
+    def _locked(self, environ, start_response):
+        start_response("402 Payment Required", [("Content-Type", "text/plain"), ("Content-Length", str(len(self.LOCKED_BODY))), ("Cache-Control", "no-store")])
+        return [self.LOCKED_BODY]
+
+    def __call__(self, environ, start_response):
+        gate = self.gate_for(environ.get("PATH_INFO", ""))
+
+        if gate is None:
+            return self.app(environ, start_response)
+
+        until = self.verdicts.verdict(gate)
+
+        if until is None:
+            return self.locked(environ, start_response)
+
+        if not self.headers:
+            return self.app(environ, start_response)
+
+        extra = cache_headers(until)
+
+        def gated_start_response(status, response_headers, exc_info=None):
+            present = {name.lower() for name, _ in response_headers}
+            return start_response(status, list(response_headers) + [h for h in extra if h[0].lower() not in present], exc_info)
+
+        return self.app(environ, gated_start_response)
+
+
+class ASGIGateMiddleware(_Routes):
+
+    LOCKED_BODY = b"Payment required"
+
+    def __init__(self, app, routes, verdicts=None, headers=True, locked=None):
+        """ASGI middleware answering 402 Payment Required on locked http routes. Other scopes pass straight through.
+
+        Arguments:
+            app: the ASGI application to wrap.
+            routes, verdicts, headers: see _Routes.
+            locked: optional ASGI application to answer locked routes instead.
+        """
+        super().__init__(routes, verdicts, headers)
+        self.app = app
+        self.locked = locked or self._locked
+
+    async def _locked(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 402,
+                    "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(self.LOCKED_BODY)).encode()), (b"cache-control", b"no-store")]})
+        await send({"type": "http.response.body", "body": self.LOCKED_BODY})
+
+    async def __call__(self, scope, receive, send):
+        gate = self.gate_for(scope["path"]) if scope["type"] == "http" else None
+
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        until = await self.verdicts.verdict_async(gate)
+
+        if until is None:
+            return await self.locked(scope, receive, send)
+
+        if not self.headers:
+            return await self.app(scope, receive, send)
+
+        extra = [(name.lower().encode(), value.encode()) for name, value in cache_headers(until)]
+
+        async def gated_send(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                present = {name.lower() for name, _ in headers}
+                message = dict(message, headers=headers + [h for h in extra if h[0] not in present])
+
+            await send(message)
+
+        return await self.app(scope, receive, gated_send)
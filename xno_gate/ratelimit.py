@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+"Client-side throttling of RPC calls: a shared token bucket, and collapsing identical calls that are already in flight."
+
+
+class RateLimitExceeded(ValueError):
+    """The call would have to wait longer than the limiter allows."""
+    pass
+
+
+class _Call:
+
+    def __init__(self):
+        """One in-flight call, shared by every caller waiting on the same key."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self):
+        """Collapse concurrent calls for the same key into one: the first caller runs it, the rest wait for its result."""
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, fn):
+        """Run {fn}, unless a call for {key} is already in flight, in which case wait for that call and share its result or exception.
+
+        Arguments:
+            key: hashable, identifies identical calls.
+            fn: callable with no arguments.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst=None, max_wait=5):
+        """Allow {rate} calls per second on average, in bursts of up to {burst}. Thread safe; share one bucket between every interface that calls the same proxy.
+
+        Calls over budget wait their turn, in order, for up to {max_wait} seconds, and raise RateLimitExceeded beyond that.
+
+        Arguments:
+            rate: float, calls per second.
+            burst: optional int, bucket size. Default is one second's worth of calls, at least 1.
+            max_wait: float, longest a call may be queued, in seconds.
+        """
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.max_wait = max_wait
+        self.acquired = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.waited = 0.0
+        self.longest_wait = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take {tokens}, sleeping until they are available.
+
+        Output: float, seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Tokens may go negative: that reserves them for this caller, queueing later ones behind it.
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+
+            if wait > self.max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(f"RPC rate limit: a call would wait {wait:.2f}s, over the {self.max_wait}s allowed.")
+
+            self._tokens -= tokens
+            self.acquired += 1
+
+            if wait > 0:
+                self.throttled += 1
+                self.waited += wait
+                self.longest_wait = max(self.longest_wait, wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+    def stats(self):
+        """Produce throttling and wait time counters."""
+        return \
+            {
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+                "waited": self.waited,
+                "longest_wait": self.longest_wait,
+            }
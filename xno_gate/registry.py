@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+from xno_gate.cache import CachingInterface
+from xno_gate.entities import LockState
+from xno_gate.gate import Gate, XnoInterface
+from xno_gate.lockstate import MemoryLockStore
+
+"Host many named gates in one process, sharing RPC lookups and one lock state store."
+
+
+class _RegisteredInterface(XnoInterface):
+
+    def __init__(self, registry, name):
+        """One gate's view of a registry: payment lookups are shared with every other gate, lock state is kept under the gate's own name."""
+        self.registry = registry
+        self.name = name
+
+    @property
+    def received_ordered(self):
+        return self.registry.xno_interface.received_ordered
+
+    @property
+    def received_columnar(self):
+        return self.registry.xno_interface.received_columnar
+
+    @property
+    def received_indexed(self):
+        return self.registry.xno_interface.received_indexed
+
+    @property
+    def receivable_aggregates(self):
+        return self.registry.xno_interface.receivable_aggregates
+
+    @property
+    def receivable_batched(self):
+        return self.registry.xno_interface.receivable_batched
+
+    def received(self, account):
+        return self.registry.xno_interface.received(account)
+
+    def iter_received(self, account):
+        return self.registry.xno_interface.iter_received(account)
+
+    def iter_received_batches(self, account):
+        return self.registry.xno_interface.iter_received_batches(account)
+
+    def last_paid(self, account, amount, since=None):
+        return self.registry.xno_interface.last_paid(account, amount, since)
+
+    def total_received(self, account, start, end=None):
+        return self.registry.xno_interface.total_received(account, start, end)
+
+    def receivable(self, account, threshold=10 ** 30):
+        return self.registry.xno_interface.receivable(account, threshold)
+
+    def receivable_many(self, accounts, threshold=10 ** 30):
+        return self.registry.xno_interface.receivable_many(accounts, threshold)
+
+    def receivable_exists(self, account, threshold=10 ** 30):
+        return self.registry.xno_interface.receivable_exists(account, threshold)
+
+    def receivable_total(self, account):
+        return self.registry.xno_interface.receivable_total(account)
+
+    def receivable_total_many(self, accounts):
+        return self.registry.xno_interface.receivable_total_many(accounts)
+
+    def save_lock_state(self, unlocked, until=None):
+
+        if until is None:
+            until = datetime.now() + timedelta(seconds=self.registry.rate_limit)
+
+        self.registry.lock_store.save(LockState(unlocked, until), self.name)
+
+    def load_lock_state(self):
+        return self.registry.lock_store.load(self.name)
+
+
+class GateRegistry:
+
+    def __init__(self, xno_interface, lock_store=None, rate_limit=60, ttl=30, maxsize=4096, executor=None):
+        """Manage many named gates that share one interface, one lookup cache and one lock state store.
+
+        Gates watching the same accounts share lookups through a CachingInterface, so each account is fetched at most once per {ttl}.
+
+        Arguments:
+            xno_interface: the XnoInterface used for payment lookups. Its own lock state is not used.
+            lock_store: optional LockStore holding every gate's verdict by name. Default is a MemoryLockStore.
+            rate_limit: int, seconds a locked verdict is cached for.
+            ttl: float, seconds a lookup result is shared between gates.
+            maxsize: int, the most lookup results cached.
+            executor: optional concurrent.futures.Executor handed to every gate, per Gate.
+        """
+        self.xno_interface = CachingInterface(xno_interface, ttl, maxsize)
+        self.lock_store = lock_store or MemoryLockStore()
+        self.rate_limit = rate_limit
+        self.executor = executor
+        self.gates = dict()
+
+    def add_gate(self, name):
+        """Create a gate called {name}, or produce the existing one. Add keys to it with Gate.add_key.
+
+        Output: Gate
+        """
+        if name not in self.gates:
+            self.gates[name] = Gate(_RegisteredInterface(self, name), self.executor)
+
+        return self.gates[name]
+
+    def remove_gate(self, name):
+        """Stop managing the gate called {name}. Its saved verdict expires on its own."""
+        self.gates.pop(name, None)
+
+    def __getitem__(self, name):
+        return self.gates[name]
+
+    def __contains__(self, name):
+        return name in self.gates
+
+    def __len__(self):
+        return len(self.gates)
+
+    def unlocked(self, name):
+        """Is the gate called {name} unlocked? See Gate.unlocked."""
+        return self.gates[name].unlocked()
+
+    def due(self, now=None):
+        """Produce the names of the gates with no verdict, or an expired one."""
+        now = now or datetime.now()
+        due = list()
+
+        for name in self.gates:
+            lock_state = self.lock_store.load(name)
+
+            if lock_state is None or lock_state.until <= now:
+                due.append(name)
+
+        return due
+
+    def refresh_due(self):
+        """Re-check every gate that is due, in one pass. The receivables of every receivable key across those gates are fetched in a single batched lookup, and each account's history is fetched once however many gates watch it.
+
+        Output: dict of gate name: a future datetime if unlocked, or None if locked.
+        """
+        now = datetime.now()
+        due = [self.gates[name] for name in self.due(now)]
+
+        receivable_keys = [key for gate in due for tiers in gate.keys.values() for key in tiers if key.receivable]
+        receivable = dict()
+
+        if receivable_keys:
+            accounts = list(dict.fromkeys(key.account for key in receivable_keys))
+            receivable = self.xno_interface.receivable_many(accounts, min(key.amount for key in receivable_keys))
+
+        return {gate.xno_interface.name: gate.refresh(now, receivable) for gate in due}
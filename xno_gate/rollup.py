@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import datetime
+import math
+import threading
+import time
+
+"Per account received totals in minute, hour and day buckets, so window totals don't rescan history."
+
+# Bucket widths in seconds, smallest first. Buckets are aligned to the epoch, so day buckets start at midnight UTC.
+_LEVELS = (60, 60 * 60, 24 * 60 * 60)
+
+
+def _seconds(when):
+    """Epoch seconds for a window edge. Payment times are whole seconds, so rounding a fractional edge up keeps both "at or after" and "before" exact."""
+    return math.ceil(when.timestamp())
+
+
+class _Rollup:
+
+    __slots__ = ("buckets", "detail", "newest", "newest_count", "synced")
+
+    def __init__(self):
+        """Bucket totals for one account, plus each minute's payments for exact totals at a window's edges."""
+        self.buckets = {size: defaultdict(int) for size in _LEVELS}
+        self.detail = defaultdict(list)
+        self.newest = None
+        self.newest_count = 0
+        self.synced = None
+
+    def add(self, timestamp, amount):
+        for size in _LEVELS:
+            self.buckets[size][timestamp // size * size] += amount
+
+        self.detail[timestamp // 60 * 60].append((timestamp, amount))
+
+        if self.newest is None or timestamp > self.newest:
+            self.newest, self.newest_count = timestamp, 1
+        elif timestamp == self.newest:
+            self.newest_count += 1
+
+    def exact(self, start, end):
+        """Total of [start, end), both within one minute."""
+        if start >= end:
+            return 0
+
+        return sum(amount for timestamp, amount in self.detail.get(start // 60 * 60, ()) if start <= timestamp < end)
+
+    def aligned(self, start, end):
+        """Total of [start, end), both on minute boundaries, reading the largest buckets that fit."""
+        total = 0
+
+        for level, size in enumerate(_LEVELS):
+            buckets = self.buckets[size]
+            larger = _LEVELS[level + 1] if level + 1 < len(_LEVELS) else None
+            inner_start = -(-start // larger) * larger if larger else end
+            inner_end = end // larger * larger if larger else end
+
+            if inner_start >= inner_end:
+                return total + sum(buckets.get(t, 0) for t in range(start, end, size))
+
+            total += sum(buckets.get(t, 0) for t in range(start, inner_start, size))
+            total += sum(buckets.get(t, 0) for t in range(inner_end, end, size))
+            start, end = inner_start, inner_end
+
+        return total
+
+    def total(self, start, end):
+        """Exact total of [start, end), in epoch seconds."""
+        if start >= end:
+            return 0
+
+        head = -(-start // 60) * 60
+        tail = end // 60 * 60
+
+        # no whole minute inside: at most two partial ones
+        if head >= tail:
+            if start // 60 == (end - 1) // 60:
+                return self.exact(start, end)
+
+            return self.exact(start, head) + self.exact(head, end)
+
+        return self.exact(start, head) + self.aligned(head, tail) + self.exact(tail, end)
+
+
+class RollupStore:
+
+    def __init__(self, max_age=30):
+        """Keep per account received totals in minute, hour and day buckets, updated incrementally from new Received payments.
+
+        A window total is a few bucket reads, largest buckets first, plus the payments in the partial minutes at either edge, so it is exact to the second.
+
+        Arguments:
+            max_age: float, seconds. refresh() only asks the interface for new payments once the account's rollup is older than this.
+        """
+        self.max_age = max_age
+        self._accounts = dict()
+        self._lock = threading.Lock()
+
+    def _rollup(self, account):
+        rollup = self._accounts.get(account)
+
+        if rollup is None:
+            rollup = self._accounts.setdefault(account, _Rollup())
+
+        return rollup
+
+    def add(self, account, received):
+        """Add Received payments to {account}'s rollup. Each payment must only be added once."""
+        with self._lock:
+            rollup = self._rollup(account)
+
+            for payment in received:
+                rollup.add(int(payment.time.timestamp()), payment.amount)
+
+    def sync(self, account, xno_interface):
+        """Add the payments to {account} newer than any already rolled up, reading the interface's history newest first only as far back as needed.
+
+        The history is read without holding the store's lock, so slow lookups for one account don't stall the others. Payments are checked against the rollup again before they are added, in case another sync got there first.
+        """
+        with self._lock:
+            newest = self._rollup(account).newest
+
+        fetched = list()
+
+        for payment in xno_interface.iter_received(account):
+            timestamp = int(payment.time.timestamp())
+
+            if newest is not None and timestamp < newest:
+                break
+
+            fetched.append((timestamp, payment.amount))
+
+        with self._lock:
+            rollup = self._rollup(account)
+            newest, seen = rollup.newest, rollup.newest_count
+            fresh = list()
+
+            for timestamp, amount in fetched:
+                if newest is not None:
+                    if timestamp < newest:
+                        break
+
+                    # payments sharing the newest second may be partly rolled up already
+                    if timestamp == newest and seen > 0:
+                        seen -= 1
+                        continue
+
+                fresh.append((timestamp, amount))
+
+            for timestamp, amount in reversed(fresh):
+                rollup.add(timestamp, amount)
+
+            rollup.synced = time.monotonic()
+
+    def refresh(self, account, xno_interface):
+        """sync() {account} if its rollup is older than max_age."""
+        rollup = self._accounts.get(account)
+
+        if rollup is None or rollup.synced is None or time.monotonic() - rollup.synced > self.max_age:
+            self.sync(account, xno_interface)
+
+    def total(self, account, start, end=None):
+        """How many raw did {account} receive from {start} until {end}?
+
+        Arguments:
+            account: str, nano public address
+            start: datetime, inclusive
+            end: optional datetime, exclusive. Default is no end.
+
+        Output: int
+        """
+        rollup = self._accounts.get(account)
+
+        if rollup is None or rollup.newest is None:
+            return 0
+
+        end = rollup.newest + 1 if end is None else _seconds(end)
+        return rollup.total(_seconds(start), end)
+
+    def histogram(self, account, start, end, bucket):
+        """How many raw did {account} receive in each {bucket} long interval from {start} until {end}?
+
+        Output: Array of (datetime bucket start, int total), oldest first. The last bucket stops at {end}.
+        """
+        rollup = self._accounts.get(account) or _Rollup()
+        width = int(bucket.total_seconds())
+        first, last = start.timestamp(), end.timestamp()
+        origin, stop = _seconds(start), _seconds(end)
+
+        return [(datetime.fromtimestamp(first + n * width), rollup.total(origin + n * width, min(origin + (n + 1) * width, stop)))
+                for n in range(max(0, math.ceil((last - first) / width)))]
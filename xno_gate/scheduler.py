@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import random
+import threading
+
+"Refresh gate verdicts in the background, just before they expire, so callers always find a warm cache."
+
+
+class _Scheduled:
+
+    def __init__(self, name, gate):
+        """Scheduling state for one gate."""
+        self.name = name
+        self.gate = gate
+        self.when = None
+        self.unlocked = None
+        self.locking = None
+
+
+class LockScheduler:
+
+    # A gate is never refreshed more often than this, however short its verdicts.
+    _MIN_INTERVAL = timedelta(seconds=1)
+
+    def __init__(self, lead=5, spread=5, retry=10, on_unlock=None, on_lock=None):
+        """Keep a heap of when each gate's LockState.until expires, and refresh each verdict {lead} seconds ahead of it.
+
+        An unlocked gate is checked as of its expiry; if no key holds it open past then, it is locked right at expiry without another lookup.
+
+        Arguments:
+            lead: float, seconds before expiry to refresh.
+            spread: float, refreshes are brought forward by up to this many random seconds, so many gates don't hit the RPC at once.
+            retry: float, seconds to wait before trying again when a refresh raises.
+            on_unlock: optional callable(name, until), called when a gate unlocks.
+            on_lock: optional callable(name, until), called when a gate locks. {until} is when the locked verdict expires.
+        """
+        self.lead = timedelta(seconds=lead)
+        self.spread = spread
+        self.retry = timedelta(seconds=retry)
+        self.on_unlock = on_unlock
+        self.on_lock = on_lock
+        self._scheduled = dict()
+        self._heap = list()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _jitter(self):
+        return timedelta(seconds=random.uniform(0, self.spread)) if self.spread else timedelta(0)
+
+    def _push(self, entry, when):
+        """Schedule {entry} at {when}. Call with the condition held."""
+        entry.when = when
+        heapq.heappush(self._heap, (when, next(self._sequence), entry))
+        self._condition.notify()
+
+    def add(self, name, gate, now=None):
+        """Start looking after {gate}, under {name}. Its first refresh is due straight away, give or take the spread."""
+        now = now or datetime.now()
+
+        with self._condition:
+            entry = self._scheduled[name] = _Scheduled(name, gate)
+            self._push(entry, now + self._jitter())
+
+    def remove(self, name):
+        """Stop looking after the gate called {name}."""
+        with self._condition:
+            entry = self._scheduled.pop(name, None)
+
+            if entry is not None:
+                entry.when = None
+
+    def _transition(self, entry, unlocked, until):
+        """Record a verdict, firing a callback if it changed."""
+        changed = entry.unlocked != unlocked
+        entry.unlocked = unlocked
+
+        if changed and unlocked and self.on_unlock:
+            self.on_unlock(entry.name, until)
+
+        if changed and not unlocked and self.on_lock:
+            self.on_lock(entry.name, until)
+
+    def _refresh(self, entry, now):
+        """Refresh one gate's verdict. Output: when it is next due."""
+        gate = entry.gate
+
+        if entry.locking:
+            expiry, entry.locking = entry.locking, None
+            lock_state = gate.xno_interface.load_lock_state()
+
+            # unlocked past the expiry this lock was scheduled for, e.g. by Gate.accept(): follow the new verdict instead
+            if lock_state and lock_state.unlocked and lock_state.until > expiry:
+                self._transition(entry, True, lock_state.until)
+                return lock_state.until - self.lead - self._jitter()
+
+            gate.xno_interface.save_lock_state(False)
+            lock_state = gate.xno_interface.load_lock_state()
+            until = lock_state.until if lock_state else now
+            self._transition(entry, False, until)
+            return until - self.lead - self._jitter()
+
+        lock_state = gate.xno_interface.load_lock_state()
+
+        if lock_state and lock_state.unlocked and lock_state.until > now:
+            until = gate.check(lock_state.until)
+
+            if until is None:
+                entry.locking = lock_state.until
+                self._transition(entry, True, lock_state.until)
+                return lock_state.until
+
+            gate.xno_interface.save_lock_state(True, until)
+            self._transition(entry, True, until)
+            return until - self.lead - self._jitter()
+
+        until = gate.refresh(now)
+
+        if until is None:
+            lock_state = gate.xno_interface.load_lock_state()
+            until = lock_state.until if lock_state else now
+            self._transition(entry, False, until)
+        else:
+            self._transition(entry, True, until)
+
+        return until - self.lead - self._jitter()
+
+    def run_pending(self, now=None):
+        """Refresh every gate that is due.
+
+        Output: int, how many gates were refreshed.
+        """
+        now = now or datetime.now()
+        due = list()
+
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                when, _, entry = heapq.heappop(self._heap)
+
+                # skip superseded and removed entries
+                if entry.when == when:
+                    due.append(entry)
+
+        for entry in due:
+            try:
+                when = self._refresh(entry, now)
+            except Exception:
+                when = now + self.retry
+
+            with self._condition:
+                if self._scheduled.get(entry.name) is entry:
+                    self._push(entry, max(when, now + self._MIN_INTERVAL))
+
+        return len(due)
+
+    def run(self):
+        """Refresh gates as they come due until stop() is called."""
+        while not self._stop.is_set():
+            self.run_pending()
+
+            with self._condition:
+                if self._stop.is_set():
+                    return
+
+                wait = (self._heap[0][0] - datetime.now()).total_seconds() if self._heap else None
+                self._condition.wait(None if wait is None else max(wait, 0))
+
+    def start(self):
+        """Refresh on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stop.set()
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"Pooled, keep-alive HTTP sessions for talking to Nano RPC nodes."
+
+
+class RPCSession:
+
+    def __init__(self, pool_size=10, timeout=10, retries=3, backoff=0.5):
+        """Keep warm connections open to RPC nodes. Share one RPCSession between interfaces that point at the same proxy so they reuse each other's connections.
+
+        Arguments:
+            pool_size: int, maximum number of connections kept alive per host.
+            timeout: float or a (connect, read) tuple, default seconds to wait on each call.
+            retries: int, how many times to retry a failed connection or a retryable response status.
+            backoff: float, backoff factor in seconds; the wait doubles on each retry.
+        """
+        self.timeout = timeout
+
+        # RPC lookups are read only, so POST is safe to retry.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def post(self, url, payload, timeout=None):
+        """Send an RPC payload over a pooled connection.
+
+        Arguments:
+            url: str, RPC node url.
+            payload: dict, the RPC call; sent as json.
+            timeout: optional override for this call only.
+
+        Output:
+            requests.Response
+        """
+        return self._session.post(url, json=payload, timeout=timeout or self.timeout)
+
+    def close(self):
+        """Close all pooled connections."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from xno_gate.gate import DefaultRPCInterface
+from xno_gate.registry import GateRegistry
+from xno_gate.scheduler import LockScheduler
+
+"""A daemon that owns the RPC traffic and lock state for many gates, answering verdicts to local workers over a Unix socket.
+
+The protocol is one line per request and per response, over a connection kept open between requests:
+
+    request:  <gate name>\\n
+    response: U <until, epoch seconds>\\n    unlocked
+              L\\n                          locked
+              E <message>\\n                unknown gate, or the lookup failed
+"""
+
+
+def registry_from_config(config):
+    """Build a GateRegistry from a config mapping.
+
+    Arguments:
+        config: dict, as loaded from json:
+            {
+                "proxy": RPC url, or a list of urls,
+                "lookback": optional int,
+                "rate_limit": optional int, seconds a locked verdict is kept,
+                "gates": {gate name: [{"account": str, "amount": int raw, "timeout": int seconds, "receivable": optional boolean}, ...]}
+            }
+
+    Output: GateRegistry
+    """
+    rpc = DefaultRPCInterface(config["proxy"], None, lookback=config.get("lookback", 25))
+    registry = GateRegistry(rpc, rate_limit=config.get("rate_limit", 60))
+
+    for name, keys in config["gates"].items():
+        gate = registry.add_gate(name)
+
+        for key in keys:
+            gate.add_key(key["account"], int(key["amount"]), int(key["timeout"]), bool(key.get("receivable", False)))
+
+    return registry
+
+
+class GateServer(socketserver.ThreadingUnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, path, registry, scheduler=None):
+        """Answer "is gate X unlocked, until when" for every gate in {registry} over a Unix socket at {path}.
+
+        Verdicts are kept warm by {scheduler}, so answering is a lock store read. A gate with no verdict yet is checked once, on the spot.
+
+        Arguments:
+            path: str or pathlib.Path, the socket file. A stale one is replaced.
+            registry: GateRegistry holding the gates.
+            scheduler: optional LockScheduler. Default refreshes every gate in the registry.
+        """
+        self.registry = registry
+        self.scheduler = scheduler or LockScheduler()
+        self.connections = set()
+
+        for name, gate in registry.gates.items():
+            self.scheduler.add(name, gate)
+
+        if os.path.exists(path):
+            os.unlink(path)
+
+        super().__init__(str(path), _GateHandler)
+
+    def verdict(self, name):
+        """Produce the response line for gate {name}."""
+        if name not in self.registry:
+            return f"E unknown gate {name}\n"
+
+        lock_state = self.registry.lock_store.load(name)
+
+        try:
+            if lock_state is not None and lock_state.until > datetime.now():
+                until = lock_state.until if lock_state.unlocked else None
+            else:
+                until = self.registry.unlocked(name)
+        except Exception as e:
+            return f"E {type(e).__name__}\n"
+
+        return "L\n" if until is None else f"U {until.timestamp()}\n"
+
+    def serve(self):
+        """Refresh in the background and answer until shutdown() is called."""
+        self.scheduler.start()
+
+        try:
+            self.serve_forever()
+        finally:
+            self.scheduler.stop()
+            self.server_close()
+
+            # clients find out straight away, rather than talking to a server that is gone
+            for connection in list(self.connections):
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+
+class _GateHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+
+    def finish(self):
+        self.server.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        for line in self.rfile:
+            self.wfile.write(self.server.verdict(line.decode().strip()).encode())
+            self.wfile.flush()
+
+
+class GateClient:
+
+    def __init__(self, path, timeout=1):
+        """Ask a GateServer for verdicts. Each thread keeps its own connection open.
+
+        Arguments:
+            path: str or pathlib.Path, the server's socket file.
+            timeout: float, seconds to wait on the server.
+        """
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            connection = self._local.connection = (sock, sock.makefile("rb"))
+
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+            self._local.connection = None
+
+    def _ask(self, name):
+        sock, reader = self._connection()
+        sock.sendall(f"{name}\n".encode())
+        line = reader.readline()
+
+        if not line:
+            raise ConnectionError("GateServer closed the connection.")
+
+        return line.decode().rstrip("\n")
+
+    def unlocked(self, name):
+        """Is the gate called {name} unlocked?
+
+        Output: a future datetime (when it will be locked again) if unlocked, or None if locked. Raises ValueError if the server can't say.
+        """
+        if "\n" in name:
+            raise ValueError("Gate names can't contain newlines.")
+
+        try:
+            line = self._ask(name)
+        except (ConnectionError, OSError):
+            # the server may have restarted since this connection was opened
+            self.close()
+            line = self._ask(name)
+
+        if line == "L":
+            return
+
+        if line.startswith("U "):
+            return datetime.fromtimestamp(float(line[2:]))
+
+        raise ValueError(f"GateServer could not answer for {name}: {line[2:]}")
+
+
+def serve_config(config_path, socket_path):
+    """Run a GateServer for the gates in the json config at {config_path}. See registry_from_config."""
+    with open(config_path) as f:
+        registry = registry_from_config(json.load(f))
+
+    GateServer(socket_path, registry).serve()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import json
+import threading
+
+from xno_gate.entities import Received, Receivable
+
+"Learn about payments as they confirm, from a node's websocket, instead of waiting for the next poll."
+
+
+def _websocket():
+    try:
+        import websocket
+    except ImportError as e:
+        raise ImportError("ConfirmationSubscriber needs the websocket-client package: pip install xno_gate[websocket]") from e
+
+    return websocket
+
+
+class ConfirmationSubscriber:
+
+    def __init__(self, gate, url, reconnect=5, timeout=30):
+        """Subscribe to a node's confirmation topic for every account in {gate}.keys, and unlock the gate as soon as a qualifying payment confirms.
+
+        Polling through Gate.unlocked keeps working alongside, as the fallback when the websocket is down.
+
+        Arguments:
+            gate: Gate to push payments to.
+            url: str, websocket url of a nano node, e.g. ws://localhost:7078
+            reconnect: float, seconds to wait before reconnecting after the connection drops.
+            timeout: float, seconds to wait when connecting.
+        """
+        self.gate = gate
+        self.url = url
+        self.reconnect = reconnect
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+        self._connection = None
+
+    def subscription(self):
+        """The subscribe message, per the [websocket spec](https://docs.nano.org/integration-guides/websockets/#confirmations)."""
+        return \
+            {
+                "action": "subscribe",
+                "topic": "confirmation",
+                "options": {"accounts": list(self.gate.keys), "include_block": "true"},
+            }
+
+    def payment(self, message):
+        """Convert a confirmation message into the (account, payment) it represents for this gate, or None.
+
+        A confirmed send to a watched account becomes a Receivable; a confirmed receive by a watched account becomes a Received.
+        """
+        if message.get("topic") != "confirmation":
+            return
+
+        confirmation = message["message"]
+        block = confirmation.get("block", dict())
+        subtype = block.get("subtype")
+        amount = int(confirmation["amount"])
+
+        if subtype == "receive" and confirmation["account"] in self.gate.keys:
+            when = datetime.fromtimestamp(int(message["time"]) / 1000) if "time" in message else datetime.now()
+            return confirmation["account"], Received(amount, when)
+
+        if subtype == "send" and block.get("link_as_account") in self.gate.keys:
+            return block["link_as_account"], Receivable(amount)
+
+        return
+
+    def handle(self, raw):
+        """Apply one websocket message to the gate.
+
+        Output: the datetime the gate is now unlocked until, or None.
+        """
+        try:
+            payment = self.payment(json.loads(raw))
+        except (ValueError, KeyError, TypeError):
+            return
+
+        if payment is None:
+            return
+
+        return self.gate.accept(*payment)
+
+    def run(self):
+        """Listen until stop() is called, reconnecting whenever the connection drops."""
+        websocket = _websocket()
+
+        while not self._stop.is_set():
+            try:
+                self._connection = websocket.create_connection(self.url, timeout=self.timeout)
+                self._connection.settimeout(None)
+                self._connection.send(json.dumps(self.subscription()))
+
+                while not self._stop.is_set():
+                    raw = self._connection.recv()
+
+                    if not raw:
+                        break
+
+                    self.handle(raw)
+            except (OSError, websocket.WebSocketException):
+                pass
+            finally:
+                if self._connection is not None:
+                    self._connection.close()
+
+            self._stop.wait(self.reconnect)
+
+    def start(self):
+        """Listen on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop listening and close the connection."""
+        self._stop.set()
+
+        if self._connection is not None:
+            self._connection.close()
+
+        if self._thread is not None:
+            self._thread.join(self.timeout)